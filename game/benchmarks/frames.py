@@ -0,0 +1,303 @@
+"""
+Plays scripted scenarios on an offscreen context and reports how long
+their frames took: the CPU time of Stage.handle_events, of the simulation
+steps and of Stage.render, the wait for the GPU to finish the frame, and
+the GPU time of the render. See HeadlessRunner for what those mean on a
+software rasterizer.
+
+Every scenario runs in a process of its own, so the scene the Stage starts
+in is picked the same way as in the game and nothing carries over between
+them. Random numbers are seeded and the simulation advances by a fixed
+frame time, so every run plays out the same frames.
+
+Run from the game directory:
+  python -m benchmarks.frames [scenario ...] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from collections import deque
+
+from engine.headless import init_headless
+
+init_headless()
+
+import glm
+import numpy as np
+import pygame
+
+from engine.events import FACE_ACTIVATED
+from engine.events.mouse import clip_to_screen
+from headless_runner import HeadlessRunner
+from scenes.gameplay_levels import LEVELS
+
+TIMINGS = ("events", "update", "render", "finish", "gpu")
+PERCENTILES = (50, 95, 99)
+# Gives up on a scenario that hasn't finished after this many frames
+MAX_FRAMES = 60 * 60 * 3
+
+# The mouse circles the puzzle while waiting, hovering over faces
+HOVER_CENTER = (480, 360)
+HOVER_RADIUS = 150
+HOVER_FRAMES_PER_TURN = 240
+
+
+def _is_settled(polyhedron):
+  return polyhedron.is_alive and not (
+    polyhedron.introduction_animator.is_animating
+    or polyhedron.enter_scene_animator.is_animating
+    or polyhedron.exit_scene_animator.is_animating
+    or polyhedron.is_face_rotating
+  )
+
+
+def _unsolved_face(polyhedron):
+  # Puzzles are solved in the orientation they were scrambled from
+  for (face_index, face) in enumerate(polyhedron.faces):
+    turns = len(face.coordinate_system.segment_vectors)
+    if round(face.rotation_animator.target_value) % turns != 0:
+      return face_index
+  return None
+
+
+class Player:
+  """
+  Hands the runner its input a frame at a time, deciding on it from the
+  state of the stage whenever the input queued so far has run out
+  """
+
+  def __init__(self):
+    self.stage = None
+    self.inputs = deque()
+
+  def get(self, frame: int):
+    if len(self.inputs) == 0:
+      self.play(frame)
+    events = self.inputs.popleft() if len(self.inputs) > 0 else []
+    return events + pygame.event.get()
+
+  def play(self, frame: int):
+    pass
+
+  def is_done(self) -> bool:
+    return True
+
+  def hover(self, frame: int):
+    angle = 2 * np.pi * frame / HOVER_FRAMES_PER_TURN
+    pos = (
+      int(HOVER_CENTER[0] + HOVER_RADIUS * np.cos(angle)),
+      int(HOVER_CENTER[1] + HOVER_RADIUS * np.sin(angle)),
+    )
+    self.inputs.append([
+      pygame.event.Event(pygame.MOUSEMOTION, {"pos": pos, "rel": (0, 0), "buttons": (0, 0, 0)}),
+    ])
+
+  def click(self, pos: tuple[int, int]):
+    self.inputs.append([
+      pygame.event.Event(pygame.MOUSEMOTION, {"pos": pos, "rel": (0, 0), "buttons": (0, 0, 0)}),
+      pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": pos, "button": pygame.BUTTON_LEFT}),
+    ])
+    self.inputs.append([
+      pygame.event.Event(pygame.MOUSEBUTTONUP, {"pos": pos, "button": pygame.BUTTON_LEFT}),
+    ])
+
+  def drag(self, start: tuple[int, int], end: tuple[int, int], frames: int):
+    self.inputs.append([
+      pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": start, "button": pygame.BUTTON_LEFT}),
+    ])
+    for frame in range(1, frames + 1):
+      pos = (
+        start[0] + (end[0] - start[0]) * frame // frames,
+        start[1] + (end[1] - start[1]) * frame // frames,
+      )
+      self.inputs.append([
+        pygame.event.Event(pygame.MOUSEMOTION, {"pos": pos, "rel": (0, 0), "buttons": (1, 0, 0)}),
+      ])
+    self.inputs.append([
+      pygame.event.Event(pygame.MOUSEBUTTONUP, {"pos": end, "button": pygame.BUTTON_LEFT}),
+    ])
+
+  def solve_face(self, polyhedron):
+    """
+    Turns a face that's out of place, as clicking it would. Returns whether
+    there was one left
+    """
+    face_index = _unsolved_face(polyhedron)
+    if face_index is None:
+      return False
+    self.inputs.append([
+      pygame.event.Event(FACE_ACTIVATED, {"face_index": face_index, "mouse_button": pygame.BUTTON_LEFT}),
+    ])
+    return True
+
+
+class IntroductionPlayer(Player):
+  """
+  Watches the logo fade in and out, and the tutorial's polyhedron fly in
+  """
+
+  def is_done(self):
+    return (
+      self.stage.intro is None
+      and not self.stage.tutorial.subject.introduction_animator.is_animating
+    )
+
+
+class TutorialPlayer(Player):
+  """
+  Drags the tutorial's polyhedron around, then solves it
+  """
+
+  def __init__(self):
+    super().__init__()
+    self.has_dragged = False
+
+  def play(self, frame):
+    subject = self.stage.tutorial.subject
+    if self.stage.intro is not None or not _is_settled(subject):
+      self.hover(frame)
+    elif not self.has_dragged:
+      self.drag((400, 300), (560, 380), 30)
+      self.has_dragged = True
+    elif subject.is_puzzle_solved or not self.solve_face(subject):
+      self.hover(frame)
+
+  def is_done(self):
+    return self.stage.scene is self.stage.gameplay
+
+
+class LevelPlayer(Player):
+  """
+  Solves every puzzle of the level the gameplay scene starts on, and moves
+  on to the next one through the next button
+  """
+
+  def __init__(self, level_index: int):
+    super().__init__()
+    self.level_index = level_index
+
+  def play(self, frame):
+    scene = self.stage.gameplay
+    if self.stage.intro is not None or self.stage.scene is not scene:
+      self.hover(frame)
+      return
+    puzzle = scene.current_puzzle()
+    if puzzle.is_puzzle_solved:
+      if scene.next_button.is_active():
+        self.click(self.next_button_position())
+      else:
+        self.hover(frame)
+    elif not _is_settled(puzzle) or not self.solve_face(puzzle):
+      self.hover(frame)
+
+  def next_button_position(self):
+    center = clip_to_screen(self.stage.gameplay.next_button.matrix * glm.vec4(0, 0, 0, 1))
+    return (int(center.x), int(center.y))
+
+  def is_done(self):
+    return (
+      self.stage.scene is not self.stage.gameplay
+      or self.stage.gameplay.current_level_index != self.level_index
+    )
+
+
+class WinPlayer(Player):
+  """
+  Watches the camera pull back from the solar system
+  """
+
+  def is_done(self):
+    return self.stage.intro is None and not self.stage.win.camera_animator.is_animating
+
+
+# Scenario name -> (environment the game reads its starting scene from, player)
+SCENARIOS = {
+  "introduction": ({}, IntroductionPlayer),
+  "tutorial": ({}, TutorialPlayer),
+  **{
+    f"level_{level_index}": (
+      {"SKIP_TUTORIAL": "1", "START_LEVEL": str(level_index)},
+      lambda level_index=level_index: LevelPlayer(level_index),
+    )
+    for level_index in range(len(LEVELS))
+  },
+  "win": ({"WINNER": "1"}, WinPlayer),
+}
+SCENARIO_ENVIRONMENT = ("SKIP_TUTORIAL", "START_LEVEL", "START_PUZZLE", "WINNER", "OVER_EASY")
+
+
+def summarize(frame_timings: list[dict], is_completed: bool):
+  summary = {"frames": len(frame_timings), "completed": is_completed}
+  for name in TIMINGS:
+    times_ms = np.array([timing[name] for timing in frame_timings]) / 1_000_000
+    summary[name] = {
+      **{f"p{percentile}": round(float(np.percentile(times_ms, percentile)), 3) for percentile in PERCENTILES},
+      "worst": round(float(times_ms.max()), 3),
+    }
+  cpu_times = [timing["events"] + timing["update"] + timing["render"] for timing in frame_timings]
+  summary["worst_frame"] = int(np.argmax(cpu_times))
+  return summary
+
+
+def play_scenario(name: str):
+  (_environment, make_player) = SCENARIOS[name]
+  random.seed(0)
+  np.random.seed(0)
+  pygame.init()
+
+  player = make_player()
+  runner = HeadlessRunner(player, is_timed=True)
+  player.stage = runner.stage
+  while not player.is_done() and runner.frame < MAX_FRAMES:
+    runner.step()
+  summary = summarize(runner.frame_timings, player.is_done())
+  runner.destroy()
+  pygame.quit()
+  return summary
+
+
+def run_scenario(name: str):
+  (environment, _make_player) = SCENARIOS[name]
+  scenario_environment = {
+    key: value for (key, value) in os.environ.items() if key not in SCENARIO_ENVIRONMENT
+  }
+  scenario_environment.update(environment)
+  with tempfile.TemporaryDirectory() as directory:
+    result_path = os.path.join(directory, "result.json")
+    subprocess.run(
+      [sys.executable, "-m", "benchmarks.frames", "--play", name, "--output", result_path],
+      env=scenario_environment,
+      stdout=subprocess.DEVNULL,
+      check=True,
+    )
+    with open(result_path, "r") as file:
+      return json.load(file)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Frame time benchmarks")
+  parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)}, all by default")
+  parser.add_argument("--output", help="write the JSON report here instead of printing it")
+  parser.add_argument("--play", choices=SCENARIOS, help=argparse.SUPPRESS)
+  args = parser.parse_args()
+  for name in args.scenarios:
+    if name not in SCENARIOS:
+      parser.error(f"unknown scenario {name}")
+
+  if args.play is not None:
+    report = play_scenario(args.play)
+  else:
+    report = {}
+    for name in args.scenarios or SCENARIOS:
+      print(f"{name}...", file=sys.stderr)
+      report[name] = run_scenario(name)
+
+  if args.output is not None:
+    with open(args.output, "w") as file:
+      json.dump(report, file, indent=2)
+  else:
+    print(json.dumps(report, indent=2))
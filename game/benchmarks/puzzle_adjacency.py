@@ -0,0 +1,121 @@
+"""
+Compare the pairwise active-polygon association PuzzleFace used to do with
+the shared-edge index it builds now, over every generated puzzle. Both
+sides include building the lookup they rely on: per-node polygon sets for
+the pairwise approach, the edge index for the new one.
+
+Run from the game directory: python -m benchmarks.puzzle_adjacency
+"""
+import os
+import time
+
+from puzzles.puzzle_graph import PuzzleGraph, get_puzzle_topology
+from puzzles.puzzle_binary import GENERATED_DIRECTORY
+
+REPEATS = 5
+
+
+def _index_edges_and_associate(face, topology):
+  (entry_polygons, _previous_entries, edge_ids) = topology.edge_index()
+  face.edge_borders_inactive = topology.entries_bordering_inactive(
+    entry_polygons, edge_ids
+  ).tolist()
+  for (polygon_a_idx, polygon_b_idx) in topology.active_polygon_pairs(entry_polygons, edge_ids).tolist():
+    face.polygons[polygon_a_idx].associate(face.polygons[polygon_b_idx])
+
+
+def _reset_neighbors(face):
+  for polygon in face.polygons:
+    polygon._active_neighbors.clear()
+    polygon.strange_face_neighbors.clear()
+
+
+def _index_node_polygons(face):
+  # The pairwise approach needs every node to know its polygons
+  node_polygons = {}
+  for polygon in face.polygons:
+    for node in polygon.nodes:
+      node_polygons.setdefault(node, set()).add(polygon)
+  return node_polygons
+
+
+def _associate_pairwise(face):
+  for polygon_a in list(face.active_polygons):
+    for polygon_b in list(face.active_polygons):
+      if polygon_a == polygon_b:
+        continue
+      if polygon_a.mates_with(polygon_b):
+        polygon_a.associate(polygon_b)
+
+
+def _inactive_neighbor_lines_by_intersection(polygon, node_polygons):
+  inactive_neighbor_lines = []
+  for (this_node, prev_node) in polygon.edges():
+    common_polygons = node_polygons[this_node].intersection(node_polygons[prev_node])
+    for other_polygon in common_polygons:
+      if other_polygon != polygon and not other_polygon.is_active:
+        inactive_neighbor_lines.append((this_node, prev_node))
+  return inactive_neighbor_lines
+
+
+def _best_time(run: callable):
+  best = None
+  for _ in range(REPEATS):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  return best
+
+
+def benchmark_puzzle(puzzle_file_name: str):
+  topology = get_puzzle_topology(puzzle_file_name)
+  graph = PuzzleGraph(topology)
+
+  def pairwise():
+    for face in graph.faces:
+      _reset_neighbors(face)
+      node_polygons = _index_node_polygons(face)
+      _associate_pairwise(face)
+      for polygon in face.active_polygons:
+        _inactive_neighbor_lines_by_intersection(polygon, node_polygons)
+
+  def edge_index():
+    for (face, face_topology) in zip(graph.faces, topology.faces):
+      _reset_neighbors(face)
+      _index_edges_and_associate(face, face_topology)
+      for polygon in face.active_polygons:
+        polygon.get_inactive_neighbor_lines()
+
+  active_count = sum(len(face.active_polygons) for face in graph.faces)
+  return (active_count, _best_time(pairwise), _best_time(edge_index))
+
+
+def puzzle_file_names():
+  names = []
+  for file_name in sorted(os.listdir(GENERATED_DIRECTORY)):
+    (puzzle_file_name, extension) = os.path.splitext(file_name)
+    if extension == '.json':
+      names.append(puzzle_file_name)
+  return names
+
+
+if __name__ == '__main__':
+  print(f"{'puzzle':<24}{'active':>8}{'pairwise ms':>14}{'edge index ms':>16}{'speedup':>10}")
+  total_pairwise = 0
+  total_edge_index = 0
+  for puzzle_file_name in puzzle_file_names():
+    try:
+      (active_count, pairwise, edge_index) = benchmark_puzzle(puzzle_file_name)
+    except KeyError:
+      continue
+    total_pairwise += pairwise
+    total_edge_index += edge_index
+    print(
+      f"{puzzle_file_name:<24}{active_count:>8}{pairwise * 1000:>14.2f}"
+      f"{edge_index * 1000:>16.2f}{pairwise / edge_index:>9.1f}x"
+    )
+  print(
+    f"{'total':<24}{'':>8}{total_pairwise * 1000:>14.2f}"
+    f"{total_edge_index * 1000:>16.2f}{total_pairwise / total_edge_index:>9.1f}x"
+  )
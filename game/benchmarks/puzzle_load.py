@@ -0,0 +1,234 @@
+"""
+Time loading every generated puzzle through PuzzleGraph and building the
+meshes of its faces, phase by phase, and record the peak memory of the
+whole load with tracemalloc.
+
+  json         reading and parsing the json file
+  topology     PuzzleTopology.from_json
+  nodes        PuzzleFace node creation
+  polygons     PuzzleFace polygon creation
+  association  active polygon association
+  terrain      the terrain mesh
+  carve        the carve and wall meshes
+  underside    the underside mesh
+  packing      indexing the meshes into f4 vertex and u4 index arrays, as
+               they're uploaded to the GPU
+
+Times are the best of REPEATS loads. They are compared against the stored
+baseline after scaling them by how much slower the phases of a puzzle
+typically came out, as a machine that's busy for the moment slows them all
+down. The run fails when a phase or the peak memory of a puzzle got more
+than TIME_TOLERANCE or MEMORY_TOLERANCE worse, after measuring the puzzle
+again up to RERUNS times. Store a new baseline with --save-baseline on the
+machine the comparisons will run on.
+
+Run from the game directory: python -m benchmarks.puzzle_load [--save-baseline]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from constants.colors import Colors
+from constants.shape import SHAPE_VERTICES
+from models.face import Face
+from models.helpers import index_vertices
+from puzzles.puzzle_graph import PuzzleGraph, get_puzzle_file
+from puzzles.puzzle_topology import PuzzleTopology
+from benchmarks.puzzle_adjacency import puzzle_file_names
+
+REPEATS = 7
+# Times a puzzle that looks slower than the baseline is measured again
+RERUNS = 2
+PHASES = (
+  "json", "topology", "nodes", "polygons", "association",
+  "terrain", "carve", "underside", "packing",
+)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'baselines', 'puzzle_load.json')
+
+# How much worse than the baseline a phase or the peak memory may get. Peak
+# memory doesn't depend on the machine
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.1
+# Phases quicker than this are left to noise
+MIN_REGRESSION_MS = 0.5
+
+
+class PhaseTimer:
+  def __init__(self):
+    self.times = defaultdict(float)
+    self.restart()
+
+  def restart(self):
+    self.last_time = time.perf_counter()
+
+  def lap(self, phase: str):
+    now = time.perf_counter()
+    self.times[phase] += now - self.last_time
+    self.last_time = now
+
+
+def _make_face(graph: PuzzleGraph, puzzle_face):
+  # Batched faces build their meshes without making any gl objects
+  return Face(
+    SHAPE_VERTICES[graph.shape][puzzle_face.face_idx],
+    puzzle_face,
+    None,
+    terrain_shader=None,
+    carve_shader=None,
+    wall_shader=None,
+    underside_shader=None,
+    wall_color=Colors.CHARCOAL,
+    underside_color=Colors.CHARCOAL,
+    is_batched=True,
+  )
+
+
+def _pack(face: Face):
+  index_vertices(face.terrain_mesh)
+  if face.has_carvings:
+    index_vertices(face.carve_mesh)
+    index_vertices(face.wall_mesh)
+  np.ascontiguousarray(face.underside_mesh, dtype="f4")
+
+
+def _load(puzzle_file_name: str):
+  graph = PuzzleGraph(PuzzleTopology.from_json(get_puzzle_file(puzzle_file_name)))
+  for puzzle_face in graph.faces:
+    _pack(_make_face(graph, puzzle_face))
+
+
+def _time_load(puzzle_file_name: str):
+  """
+  The graph and faces are built whole first, then every phase is run again
+  on them on its own, in the order they depend on each other
+  """
+  timer = PhaseTimer()
+  puzzle_json = get_puzzle_file(puzzle_file_name)
+  timer.lap("json")
+  topology = PuzzleTopology.from_json(puzzle_json)
+  timer.lap("topology")
+
+  graph = PuzzleGraph(topology)
+  faces = [_make_face(graph, puzzle_face) for puzzle_face in graph.faces]
+
+  for (puzzle_face, face_topology, face) in zip(graph.faces, topology.faces, faces):
+    timer.restart()
+    node_list = puzzle_face._create_nodes(face_topology)
+    timer.lap("nodes")
+    puzzle_face._create_polygons(face_topology, node_list)
+    timer.lap("polygons")
+    puzzle_face._associate_active_polygons(face_topology)
+    timer.lap("association")
+    face._make_terrain_mesh()
+    timer.lap("terrain")
+    underside_inner_vertices = face._make_carve_meshes()
+    timer.lap("carve")
+    face._make_underside_mesh(underside_inner_vertices)
+    timer.lap("underside")
+    _pack(face)
+    timer.lap("packing")
+  return timer.times
+
+
+def _peak_memory(puzzle_file_name: str):
+  tracemalloc.start()
+  _load(puzzle_file_name)
+  (_current, peak) = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return peak
+
+
+def benchmark_puzzle(puzzle_file_name: str):
+  """
+  @returns: the best time of every phase in ms, and the peak memory in KiB
+  """
+  best = {phase: None for phase in PHASES}
+  for _ in range(REPEATS):
+    # Collections would land in whichever phase happened to trigger them
+    gc.collect()
+    gc.disable()
+    try:
+      times = _time_load(puzzle_file_name)
+    finally:
+      gc.enable()
+    for phase in PHASES:
+      elapsed = times[phase] * 1000
+      best[phase] = elapsed if best[phase] is None else min(best[phase], elapsed)
+  result = {phase: round(best[phase], 3) for phase in PHASES}
+  result["peak_kib"] = round(_peak_memory(puzzle_file_name) / 1024, 1)
+  return result
+
+
+def find_regressions(results: dict, baseline: dict):
+  regressions = []
+  for (puzzle_file_name, result) in results.items():
+    baseline_result = baseline.get(puzzle_file_name)
+    if baseline_result is None:
+      continue
+    # A busy machine slows every phase down alike, a regression only some
+    speed = 1 / np.median([result[phase] / baseline_result[phase] for phase in PHASES])
+    for phase in PHASES:
+      (elapsed, baseline_elapsed) = (result[phase] * speed, baseline_result[phase])
+      if (
+        elapsed > baseline_elapsed * (1 + TIME_TOLERANCE)
+        and elapsed - baseline_elapsed > MIN_REGRESSION_MS
+      ):
+        regressions.append(f"{puzzle_file_name} {phase}: {baseline_elapsed:.2f} -> {elapsed:.2f} ms")
+    if result["peak_kib"] > baseline_result["peak_kib"] * (1 + MEMORY_TOLERANCE):
+      regressions.append(
+        f"{puzzle_file_name} peak memory: {baseline_result['peak_kib']:.0f} -> {result['peak_kib']:.0f} KiB"
+      )
+  return regressions
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description="Puzzle load and mesh build benchmarks")
+  parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+  args = parser.parse_args()
+
+  print(f"{'puzzle':<24}" + "".join(f"{phase:>12}" for phase in PHASES) + f"{'peak KiB':>10}")
+  results = {}
+  for puzzle_file_name in puzzle_file_names():
+    try:
+      result = benchmark_puzzle(puzzle_file_name)
+    except KeyError:
+      continue
+    results[puzzle_file_name] = result
+    print(
+      f"{puzzle_file_name:<24}" + "".join(f"{result[phase]:>12.2f}" for phase in PHASES)
+      + f"{result['peak_kib']:>10.0f}"
+    )
+
+  if args.save_baseline:
+    os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+    with open(BASELINE_PATH, 'w') as file:
+      json.dump(results, file, indent=2, sort_keys=True)
+    print(f"Saved the baseline to {BASELINE_PATH}")
+  elif os.path.exists(BASELINE_PATH):
+    with open(BASELINE_PATH, 'r') as file:
+      baseline = json.load(file)
+    regressions = find_regressions(results, baseline)
+    # Measure the puzzles that look slower again, so a hiccup of the machine
+    # during one of them isn't taken for a regression
+    for _ in range(RERUNS):
+      for puzzle_file_name in {regression.split(" ")[0] for regression in regressions}:
+        rerun = benchmark_puzzle(puzzle_file_name)
+        results[puzzle_file_name] = {
+          key: min(value, rerun[key]) for (key, value) in results[puzzle_file_name].items()
+        }
+      regressions = find_regressions(results, baseline)
+    if len(regressions) > 0:
+      print("Worse than the baseline:")
+      for regression in regressions:
+        print(f"  {regression}")
+      sys.exit(1)
+    print("No regressions against the baseline")
+  else:
+    print("No baseline yet, store one with --save-baseline")
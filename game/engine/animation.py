@@ -1,5 +1,37 @@
 from enum import Enum
+import heapq
 import math
+import numpy as np
+from engine.clock import world_clock
+
+# Samples per easing table, they're looked up with linear interpolation
+EASING_RESOLUTION = 1024
+
+BACK_OVERSHOOT = 1.70158
+ELASTIC_PERIOD = 2 * math.pi / 3
+
+
+class AnimationActivity:
+    """
+    Notes whether anything on screen moved since the last reset, and how
+    many animators ran. The main loop resets it every frame, anything that
+    animates marks it.
+    """
+
+    def __init__(self):
+        self.is_active = False
+        self.animators = 0
+
+    def mark(self, animators: int = 0):
+        self.is_active = True
+        self.animators += animators
+
+    def reset(self):
+        self.is_active = False
+        self.animators = 0
+
+
+animation_activity = AnimationActivity()
 
 
 class AnimationLerpFunction(Enum):
@@ -7,54 +39,94 @@ class AnimationLerpFunction(Enum):
     ease_out = "ease_out"
     ease_in = "ease_in"
     ease_in_out = "ease_in_out"
+    ease_in_back = "ease_in_back"
+    ease_out_back = "ease_out_back"
+    ease_out_elastic = "ease_out_elastic"
+
+
+class EasingCurve:
+    """
+    An easing curve sampled once into a fixed-resolution table, so looking
+    it up costs the same whatever the curve is.
+
+    curve maps an array of time percents in [0, 1] to progressions, and
+    has to start at 0 and end at 1.
+    """
+
+    def __init__(self, curve: callable):
+        self.times = np.linspace(0, 1, EASING_RESOLUTION + 1)
+        self.table = np.asarray(curve(self.times), dtype="f8")
+        # The ends have to be exact, animators finish on them
+        self.table[0] = 0
+        self.table[-1] = 1
+        self.samples = self.table.tolist()
+
+    @staticmethod
+    def cubic_bezier(x1: float, y1: float, x2: float, y2: float):
+        """
+        A curve like CSS's cubic-bezier(x1, y1, x2, y2), resampled at even
+        time steps
+        """
+        t = np.linspace(0, 1, EASING_RESOLUTION * 8 + 1)
+        def bezier(p1, p2):
+            return 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3
+        (xs, ys) = (bezier(x1, x2), bezier(y1, y2))
+        return EasingCurve(lambda time_percents: np.interp(time_percents, xs, ys))
+
+    def sample(self, time_percent: float):
+        position = time_percent * EASING_RESOLUTION
+        index = int(position)
+        if index >= EASING_RESOLUTION:
+            return self.samples[-1]
+        lower = self.samples[index]
+        return lower + (self.samples[index + 1] - lower) * (position - index)
+
+    def lookup(self, time_percents: np.ndarray):
+        return np.interp(time_percents, self.times, self.table)
+
+
+def _ease_out_elastic(t):
+    with np.errstate(over="ignore"):
+        return np.power(2.0, -10 * t) * np.sin((t * 10 - 0.75) * ELASTIC_PERIOD) + 1
+
+EASING_CURVES = {
+    AnimationLerpFunction.linear: EasingCurve(lambda t: t),
+    AnimationLerpFunction.ease_out: EasingCurve(lambda t: 1 - (1 - t) ** 3),
+    AnimationLerpFunction.ease_in: EasingCurve(lambda t: t ** 3),
+    AnimationLerpFunction.ease_in_out: EasingCurve(
+        lambda t: t ** 3 + ((1 - (1 - t) ** 3) - t ** 3) * t
+    ),
+    AnimationLerpFunction.ease_in_back: EasingCurve(
+        lambda t: (BACK_OVERSHOOT + 1) * t ** 3 - BACK_OVERSHOOT * t ** 2
+    ),
+    AnimationLerpFunction.ease_out_back: EasingCurve(
+        lambda t: 1 + (BACK_OVERSHOOT + 1) * (t - 1) ** 3 + BACK_OVERSHOOT * (t - 1) ** 2
+    ),
+    AnimationLerpFunction.ease_out_elastic: EasingCurve(_ease_out_elastic),
+}
 
 
 class AnimationLerper:
     def __init__(
         self,
-        function: AnimationLerpFunction,
+        function: AnimationLerpFunction | EasingCurve,
         duration_ms: int,
     ):
-        self.__set_function(function)
+        self.curve = EASING_CURVES.get(function, function)
         self.duration_ms = duration_ms
 
-    def __set_function(self, function: AnimationLerpFunction):
-        if function == AnimationLerpFunction.linear:
-            self._interpolator = self._interpolate_linear
-        elif function == AnimationLerpFunction.ease_out:
-            self._interpolator = self._interpolate_ease_out
-        elif function == AnimationLerpFunction.ease_in:
-            self._interpolator = self._interpolate_ease_in
-        elif function == AnimationLerpFunction.ease_in_out:
-            self._interpolator = self._interpolate_ease_in_out
-
-    def _interpolate_ease_in(self, time_elapsed: float):
-        return math.pow(time_elapsed / self.duration_ms, 3)
-
-    def _interpolate_ease_out(self, time_elapsed: float):
-        time_percent = time_elapsed / self.duration_ms
-        return 1 - math.pow(1 - time_percent, 3)
-
-    def _interpolate_ease_in_out(self, time_elapsed: float):
-        time_percent = time_elapsed / self.duration_ms
-        out_val = self._interpolate_ease_out(time_elapsed)
-        in_val = self._interpolate_ease_in(time_elapsed)
-        return in_val + (out_val - in_val) * time_percent
-
-    def _interpolate_linear(self, time_elapsed: float):
-        return time_elapsed / self.duration_ms
-
     def interpolate(self, time_elapsed: float):
         if time_elapsed >= self.duration_ms:
             return 1
         elif time_elapsed == 0:
             return 0
         else:
-            return self._interpolator(time_elapsed)
+            return self.curve.sample(time_elapsed / self.duration_ms)
 
 
 class Animator:
     def __init__(self, lerper: AnimationLerper, start_value: float, **kwargs):
+        self.system = None
         self.is_animating = False
         self.current_value = start_value
         self.start_value = start_value
@@ -68,12 +140,22 @@ class Animator:
         self.reversible = kwargs.get("reversible", False)
         self.infinite = kwargs.get("infinite", False)
 
+        # Animators in an AnimationSystem are advanced by its frame
+        system = kwargs.get("system", None)
+        if system is not None:
+            system.add(self)
+
+    def __write(self):
+        if self.system is not None:
+            self.system.write(self)
+
     def set(self, value: float):
         self.current_value = value
         self.target_value = value
         self.time_elapsed = 0
         self.delay_time = 0
         self.is_animating = False
+        self.__write()
 
     def delay(self, target_value: float, delay_time: int):
         if self.is_animating:
@@ -87,6 +169,7 @@ class Animator:
         self.target_value = target_value
         self.difference = target_value - self.current_value
         self.delay_time = delay_time
+        self.__write()
 
     def start(self, target_value: float):
         if self.is_animating:
@@ -100,11 +183,16 @@ class Animator:
         self.delay_time = 0
         self.target_value = target_value
         self.difference = target_value - self.current_value
+        self.__write()
 
     def frame(self, delta_time: int):
+        if self.system is not None:
+            # Stepped by the system, interpolated for the frame being rendered
+            return self.system.value(self)
         if not self.is_animating:
             return self.current_value
 
+        animation_activity.mark()
         self.time_elapsed += delta_time
 
         if self.delay_time > 0:
@@ -115,18 +203,22 @@ class Animator:
 
         progression = self.lerper.interpolate(self.time_elapsed)
         new_value = self.current_value + (progression * self.difference)
-        if progression >= 1:
-            if self.reversible:
-                self.reverse()
-            elif self.infinite:
-                self.reset()
-            else:
-                self.stop()
+        # Curves can overshoot 1 on the way, so finish on time
+        if self.time_elapsed >= self.lerper.duration_ms:
+            self.finish()
         elif self.on_frame:
             self.on_frame(new_value)
 
         return new_value
 
+    def finish(self):
+        if self.reversible:
+            self.reverse()
+        elif self.infinite:
+            self.reset()
+        else:
+            self.stop()
+
     def reset(self):
         self.current_value = self.start_value
         self.is_animating = False
@@ -143,5 +235,222 @@ class Animator:
         self.current_value = self.target_value
         self.is_animating = False
         self.difference = 0
+        self.__write()
         if self.on_stop:
             self.on_stop(self.current_value)
+
+
+class LoopingAnimation:
+    """
+    An endless animation evaluated straight from the world clock. It keeps
+    no state that has to be advanced every frame, and doesn't drift however
+    long it runs.
+
+    Every period it eases from start_value to target_value, then starts over
+    or, when reversible, eases back. phase gives the progress through the
+    current period, for shaders to evaluate the loop from a time uniform.
+    """
+
+    def __init__(
+        self,
+        lerper: AnimationLerper,
+        start_value: float,
+        target_value: float,
+        reversible: bool = False,
+    ):
+        self.lerper = lerper
+        self.start_value = start_value
+        self.target_value = target_value
+        self.reversible = reversible
+        self.start_time = None
+        self.stopped_value = start_value
+
+    @property
+    def is_animating(self):
+        return self.start_time is not None
+
+    def start(self):
+        if self.start_time is None:
+            self.start_time = world_clock.render_time
+
+    def stop(self):
+        self.stopped_value = self.value()
+        self.start_time = None
+
+    def phase(self, world_time: int = None):
+        """
+        @returns: (loops done, progress through the current loop in [0, 1))
+        """
+        if world_time is None:
+            world_time = world_clock.render_time
+        (loops, time_elapsed) = divmod(world_time - self.start_time, self.lerper.duration_ms)
+        return (int(loops), time_elapsed / self.lerper.duration_ms)
+
+    def value(self, world_time: int = None):
+        if self.start_time is None:
+            return self.stopped_value
+        animation_activity.mark()
+        (loops, time_percent) = self.phase(world_time)
+        progression = self.lerper.curve.sample(time_percent)
+        if self.reversible and loops % 2 == 1:
+            progression = 1 - progression
+        return self.start_value + progression * (self.target_value - self.start_value)
+
+
+class AnimationSystem:
+    """
+    Advances a group of Animators with one vectorized step per simulation
+    step, and presents them once per rendered frame.
+
+    The state of every registered animator lives in parallel arrays. Only
+    the animators in the active set are stepped: start() wakes an animator
+    into it and stop() retires it, while delayed animators wait on a timer
+    heap until their delay is over. A frame with nothing running costs next
+    to nothing, and otherwise about the same however many are running.
+
+    Stepping only calls back into Python for the animators finishing, which
+    stop, reverse or restart through their own methods. The animators that
+    fire on_frame are called from present, with their value interpolated
+    between the last two steps, as is the value Animator.frame reads.
+
+    The easing curves in use are stacked into one table, indexed by every
+    animator's easing id, so they're all looked up together.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.animators = []
+        self.current = np.zeros(capacity)
+        self.difference = np.zeros(capacity)
+        self.elapsed = np.zeros(capacity)
+        self.duration = np.ones(capacity)
+        self.easing = np.zeros(capacity, dtype="i4")
+        self.has_on_frame = np.zeros(capacity, dtype="?")
+        self.values = np.zeros(capacity)
+        self.previous = np.zeros(capacity)
+
+        self.curves = []
+        self.easing_tables = np.zeros((0, EASING_RESOLUTION + 1))
+
+        self.time = 0
+        self.active = set()
+        # (wake time, animator index, generation) of delayed animators, a
+        # timer is stale once its animator has been written again since
+        self.timers = []
+        self.generations = []
+
+    @property
+    def is_animating(self):
+        return len(self.active) > 0 or len(self.timers) > 0
+
+    def __easing_id(self, curve: EasingCurve):
+        if curve not in self.curves:
+            self.curves.append(curve)
+            self.easing_tables = np.stack([curve.table for curve in self.curves])
+        return self.curves.index(curve)
+
+    def __grow(self):
+        for name in (
+            "current", "difference", "elapsed", "duration",
+            "easing", "has_on_frame", "values", "previous",
+        ):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+
+    def add(self, animator: Animator):
+        index = len(self.animators)
+        if index == len(self.current):
+            self.__grow()
+        self.animators.append(animator)
+        self.generations.append(0)
+        animator.system = self
+        animator.system_index = index
+        self.duration[index] = animator.lerper.duration_ms
+        self.easing[index] = self.__easing_id(animator.lerper.curve)
+        self.write(animator)
+
+    def write(self, animator: Animator):
+        index = animator.system_index
+        self.generations[index] += 1
+        self.current[index] = animator.current_value
+        self.difference[index] = animator.difference
+        self.elapsed[index] = animator.time_elapsed
+        self.has_on_frame[index] = animator.on_frame is not None
+        self.values[index] = animator.current_value
+        self.previous[index] = animator.current_value
+
+        if animator.is_animating and animator.delay_time > 0:
+            self.active.discard(index)
+            heapq.heappush(self.timers, (
+                self.time + animator.delay_time - animator.time_elapsed,
+                index,
+                self.generations[index],
+            ))
+        elif animator.is_animating:
+            self.active.add(index)
+        else:
+            self.active.discard(index)
+
+    def value(self, animator: Animator):
+        index = animator.system_index
+        previous = self.previous[index]
+        return float(previous + (self.values[index] - previous) * world_clock.alpha)
+
+    def present(self):
+        """
+        Calls on_frame on the running animators with their value for the
+        frame being rendered
+        """
+        if not self.is_animating:
+            return
+        animation_activity.mark(len(self.active))
+        active = [index for index in sorted(self.active) if self.has_on_frame[index]]
+        if len(active) == 0:
+            return
+        previous = self.previous[active]
+        values = previous + (self.values[active] - previous) * world_clock.alpha
+        for (index, value) in zip(active, values):
+            self.animators[index].on_frame(float(value))
+
+    def frame(self, delta_time: float):
+        self.time += delta_time
+        if len(self.active) > 0:
+            self.__step(delta_time)
+        # Woken after the step, a delay that runs out starts from zero next step
+        while len(self.timers) > 0 and self.timers[0][0] <= self.time:
+            (_, index, generation) = heapq.heappop(self.timers)
+            if generation == self.generations[index]:
+                animator = self.animators[index]
+                animator.delay_time = 0
+                animator.time_elapsed = 0
+                self.write(animator)
+
+    def __step(self, delta_time: float):
+        active = np.array(sorted(self.active))
+        self.previous[active] = self.values[active]
+        elapsed = self.elapsed[active] + delta_time
+        self.elapsed[active] = elapsed
+
+        duration = self.duration[active]
+        position = np.minimum(elapsed / duration, 1) * EASING_RESOLUTION
+        index = np.minimum(position.astype("i4"), EASING_RESOLUTION - 1)
+        table_index = self.easing[active] * (EASING_RESOLUTION + 1) + index
+        lower = self.easing_tables.take(table_index)
+        upper = self.easing_tables.take(table_index + 1)
+        progression = lower + (upper - lower) * (position - index)
+
+        # Curves can overshoot 1 on the way, so finish on time
+        is_finished = elapsed >= duration
+        progression[is_finished] = 1
+        new_values = self.current[active] + progression * self.difference[active]
+        self.values[active] = new_values
+
+        for (index, value) in zip(active[is_finished], new_values[is_finished]):
+            self.animators[index].finish()
+            # Until the next step it still shows where the animation ended
+            self.values[index] = value
+            self.previous[index] = value
+
+
+# Advanced and presented by the Stage, for the animators that don't belong
+# to a system of their own
+animation_scheduler = AnimationSystem()
@@ -14,22 +14,22 @@ Date: Feb 21][2021
 Copied from https://github.com/zishun/pyqt-meshviewer/blob/master/ArcBall.py
 """
 
+import math
+import glm
 import pygame
-import numpy as np
 from engine.events import emit_event, ARCBALL_MOVE, ARCBALL_DONE
 
 from constants.dimensions import SCREEN_DIMENSIONS
-__all__ = ['ArcBall', 'ArcBallUtil']
-
-SQRT3 = np.sqrt(3)
+__all__ = ['ArcBall']
 
 class ArcBall:
+    EVENT_TYPES = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.MOUSEMOTION)
+
     def __init__(self, on_transform_change: callable, **kwargs):
-        # Saved Vectors - used so we don't allocate new vectors
+        # Saved Vectors - updated in place so we don't allocate new vectors
         # every time an event occurs
-        self.start_vector = np.zeros(3, 'f4')  # Saved click vector
-        self.drag_vector = np.zeros(3, 'f4')  # Saved drag vector
-        self.temp_coordinates = [None, None]
+        self.start_vector = glm.vec3()  # Saved click vector
+        self.drag_vector = glm.vec3()  # Saved drag vector
 
         # Adjustments for transforming mouse coordinates from pixel to cartesian space
         self.adjust_width = 1.0 / ((SCREEN_DIMENSIONS[0] - 1.0) * 0.5)
@@ -39,10 +39,11 @@ class ArcBall:
         # max precision of 7 bits
         self.epsilon = 1.0e-5
 
-        # the transforms for m_model
-        self._rot3x3 = np.identity(3, dtype='f4')
-        self._last_rot3x3 = np.identity(3, dtype='f4')
-        self.transform = np.identity(4, dtype='f4')
+        # The rotation before the current drag, and including it
+        self.last_rotation = glm.quat()
+        self.rotation = glm.quat()
+        # the transform for m_model
+        self.transform = glm.mat4()
 
         self.on_transform_change = on_transform_change
 
@@ -52,15 +53,15 @@ class ArcBall:
 
     def handle_event(self, event: pygame.event.Event):
         if event.type == pygame.MOUSEBUTTONDOWN:
-            self.on_down(pygame.mouse.get_pos())
+            self.on_down(event.pos)
         elif event.type == pygame.MOUSEBUTTONUP:
-            self.on_up()
+            self.on_up(event.pos)
         elif event.type == pygame.MOUSEMOTION:
-            self.on_move(pygame.mouse.get_pos())
+            self.on_move(event.pos)
 
     def on_down(self, click_coordinates: tuple[int, int]):  # Mouse down
         self.is_dragging = True
-        self._last_rot3x3 = self._rot3x3
+        self.last_rotation = self.rotation
         # Map the point to the sphere
         self._map_to_sphere(click_coordinates, self.start_vector)
 
@@ -71,128 +72,61 @@ class ArcBall:
         # Map the point to the sphere
         self._map_to_sphere(drag_coordinates, self.drag_vector)
 
-        # Return the quaternion equivalent to the rotation
         # Compute the vector perpendicular to the begin and end vectors
-        perpindicular = np.cross(self.start_vector, self.drag_vector)
-
-        new_rotation_quat = np.zeros((4,), 'f4')
+        perpindicular = glm.cross(self.start_vector, self.drag_vector)
 
         # Compute the length of the perpendicular vector
-        if np.linalg.norm(perpindicular) > self.epsilon:  # if its non-zero
-            # We're ok, so return the perpendicular vector as the transform
-            # after all
-            new_rotation_quat[:3] = perpindicular[:3]
-            # In the quaternion values, w is cosine (theta / 2), where theta
-            # is rotation angle
-            new_rotation_quat[3] = np.dot(self.start_vector, self.drag_vector)
+        if glm.length(perpindicular) > self.epsilon:  # if its non-zero
+            # The perpendicular vector is the rotation axis and, as in the
+            # original, w is the cosine of the angle between the vectors
+            drag_rotation = glm.quat(glm.dot(self.start_vector, self.drag_vector), perpindicular)
+            # Accumulate Last Rotation Into This One
+            self.rotation = glm.normalize(drag_rotation * self.last_rotation)
         else:  # if its zero
-            # The begin and end vectors coincide, so return an identity
-            # transform
-            pass
-
-        # Convert Quaternion Into Matrix3fT
-        self._rot3x3 = self.Matrix3fSetRotationFromQuat4f(new_rotation_quat)
-        # Accumulate Last Rotation Into This One
-        self._rot3x3 = np.matmul(self._last_rot3x3, self._rot3x3)
-        # Set Our Final Transform's Rotation From This One
-        self.transform = self.Matrix4fSetRotationFromMatrix3f(
-            self.transform, self._rot3x3
-        )
+            # The begin and end vectors coincide, so there's no drag rotation
+            self.rotation = self.last_rotation
+
+        self.transform = glm.mat4_cast(self.rotation)
         self.on_transform_change(self.transform)
         if self.emit_events:
-            emit_event(ARCBALL_MOVE, {})
+            emit_event(ARCBALL_MOVE, immediate=True)
 
-    def on_up(self):
+    def on_up(self, release_coordinates: tuple[int, int]):
         if not self.is_dragging:
             return
         self.is_dragging = False
-        self._last_rot3x3 = self._rot3x3
+        self.last_rotation = self.rotation
 
         if self.emit_events:
-            emit_event(ARCBALL_DONE, { 'mouse_pos': pygame.mouse.get_pos() })
+            emit_event(ARCBALL_DONE, { 'mouse_pos': release_coordinates }, immediate=True)
 
     # def reset(self):
-        # self._last_rot3x3 = np.identity(3, 'f4')
-        # self._rot3x3 = np.identity(3, 'f4')
-        # self.transform = self.Matrix4fSetRotationFromMatrix3f(
-        #   self.transform, self._rot3x3
-        # )
+        # self.last_rotation = glm.quat()
+        # self.rotation = glm.quat()
+        # self.transform = glm.mat4_cast(self.rotation)
 
-    def _map_to_sphere(self, event_coordinates: tuple[int, int], update_vector):
+    def _map_to_sphere(self, event_coordinates: tuple[int, int], update_vector: glm.vec3):
         # Adjust point coords and scale down to range of [-1 ... 1]
-        self.temp_coordinates[0] = (event_coordinates[0] * self.adjust_width) - 1.0
-        self.temp_coordinates[1] = 1.0 - (event_coordinates[1] * self.adjust_height)
+        x = (event_coordinates[0] * self.adjust_width) - 1.0
+        y = 1.0 - (event_coordinates[1] * self.adjust_height)
 
         # Compute the square of the length of the vector to the point from the
         # center
-        length_squared = np.dot(self.temp_coordinates, self.temp_coordinates)
+        length_squared = x * x + y * y
 
         # If the point is mapped outside of the sphere...
         # (length^2 > radius squared)
         if length_squared > 1.0:
             # Compute a normalizing factor (radius / sqrt(length))
-            norm = 1.0 / np.sqrt(length_squared)
+            norm = 1.0 / math.sqrt(length_squared)
 
             # Return the "normalized" vector, a point on the sphere
-            update_vector[0] = self.temp_coordinates[0] * norm
-            update_vector[1] = -self.temp_coordinates[1] * norm
-            update_vector[2] = 0.0
+            update_vector.x = x * norm
+            update_vector.y = -y * norm
+            update_vector.z = 0.0
         else:    # Else it's on the inside
             # Return a vector to a point mapped inside the sphere
             # sqrt(radius squared - length^2)
-            update_vector[0] = self.temp_coordinates[0]
-            update_vector[1] = -self.temp_coordinates[1]
-            update_vector[2] = np.sqrt(1.0 - length_squared)
-
-    # Sets the rotational component (top-left 3x3) of NewObj to the matrix
-    # values in the m3x3 argument; the other elements of NewObj are unchanged
-    # a singular value decomposition is performed on NewObj's upper 3x3 matrix
-    # to factor out the scale, then NewObj's upper 3x3 matrix components are
-    # replaced by the passed rotation components m3x3, and then the scale is
-    # reapplied to the rotational components.
-    def Matrix4fSetRotationFromMatrix3f(self, rot_mat, m3x3):
-        scale = np.linalg.norm(rot_mat[:3, :3], ord='fro') / SQRT3
-        # rot_mat[0:3][0:3] = m3x3 * scale
-        scaled_matrix = m3x3 * scale
-        for x in range(3):
-          for y in range(3):
-            rot_mat[x][y] = scaled_matrix[x][y]
-        return rot_mat
-
-    def Matrix3fSetRotationFromQuat4f(self, quat):
-        if np.sum(np.dot(quat, quat)) < self.epsilon:
-            return np.identity(3, 'f4')
-
-        # Copied from https://github.com/scipy/scipy/blob/main/scipy/spatial/transform/_rotation.pyx
-        r = np.ndarray(shape=(3,3), dtype='f4')
-
-        x = quat[0]
-        y = quat[1]
-        z = quat[2]
-        w = quat[3]
-
-        x2 = x * x
-        y2 = y * y
-        z2 = z * z
-        w2 = w * w
-
-        xy = x * y
-        zw = z * w
-        xz = x * z
-        yw = y * w
-        yz = y * z
-        xw = x * w
-
-        r[0][0] = x2 - y2 - z2 + w2
-        r[1][0] = 2 * (xy + zw)
-        r[2][0] = 2 * (xz - yw)
-
-        r[0][1] = 2 * (xy - zw)
-        r[1][1] = - x2 + y2 - z2 + w2
-        r[2][1] = 2 * (yz + xw)
-
-        r[0][2] = 2 * (xz + yw)
-        r[1][2] = 2 * (yz - xw)
-        r[2][2] = - x2 - y2 + z2 + w2
-
-        return np.transpose(r)
\ No newline at end of file
+            update_vector.x = x
+            update_vector.y = -y
+            update_vector.z = math.sqrt(1.0 - length_squared)
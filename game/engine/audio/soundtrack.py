@@ -1,6 +1,7 @@
 from enum import Enum
 from os import listdir, path
 from engine.events import MUSIC_TRACK_END, LEVEL_LOADED, PUZZLE_LOADED
+from engine.trace import tracer
 from pygame import mixer
 import pygame
 
@@ -29,6 +30,7 @@ for song_name in SoundtrackSong:
 
 
 class Soundtrack:
+  EVENT_TYPES = (MUSIC_TRACK_END, LEVEL_LOADED, PUZZLE_LOADED)
 
   def __init__(self):
     self.tracks = None
@@ -40,14 +42,15 @@ class Soundtrack:
       mixer.music.queue(self.tracks[self.track_num])
     elif event.type == LEVEL_LOADED:
       mixer.music.fadeout(100)
-      self.set_song(event.__dict__['song'])
+      self.set_song(event.song)
     elif event.type == PUZZLE_LOADED:
       self.play()
 
   def set_song(self, song_name: SoundtrackSong):
     self.track_num = 0
     self.tracks = TRACK_ATLAS[song_name]
-    mixer.music.load(self.tracks[self.track_num])
+    with tracer.span("load music", "audio", song=song_name.value):
+      mixer.music.load(self.tracks[self.track_num])
 
   def set_volume(self, vol: float):
     mixer.music.set_volume(vol)
@@ -0,0 +1,83 @@
+import time
+
+# Game logic advances in fixed steps of this many nanoseconds
+SIMULATION_STEP_NS = 1_000_000_000 // 240
+SIMULATION_STEP_MS = SIMULATION_STEP_NS / 1_000_000
+# After a hitch longer than this many steps the rest of it is dropped
+# instead of being caught up on
+MAX_STEPS_PER_FRAME = 25
+
+
+class WorldClock:
+    """
+    Milliseconds of world time since the game started. The main loop
+    advances it a simulation step at a time, anything can read it.
+
+    alpha is how far the frame being rendered is into the next step, so
+    rendering can interpolate between the last two steps.
+    """
+
+    def __init__(self):
+        self.time = 0
+        self.alpha = 0.0
+
+    def advance(self, delta_time: float):
+        self.time += delta_time
+
+    @property
+    def render_time(self):
+        """
+        The world time of what's on screen, interpolated states trail the
+        last step by up to one step
+        """
+        return self.time - (1 - self.alpha) * SIMULATION_STEP_MS
+
+
+class FixedTimestep:
+    """
+    Measures real time with perf_counter_ns and hands it out as whole
+    simulation steps. What's left over carries into the next frame.
+    """
+
+    def __init__(self, step_ns: int = SIMULATION_STEP_NS):
+        self.step_ns = step_ns
+        self.last_time_ns = time.perf_counter_ns()
+        self.accumulated_ns = 0
+        self.frame_time_ns = 0
+
+    def steps(self, frame_time_ns: int = None) -> int:
+        """
+        @param frame_time_ns: the length of the frame, measured since the
+                              last call when it isn't given
+        @returns: how many steps to simulate for the frame
+        """
+        now = time.perf_counter_ns()
+        self.frame_time_ns = now - self.last_time_ns if frame_time_ns is None else frame_time_ns
+        self.last_time_ns = now
+        self.accumulated_ns += self.frame_time_ns
+
+        steps = self.accumulated_ns // self.step_ns
+        if steps > MAX_STEPS_PER_FRAME:
+            steps = MAX_STEPS_PER_FRAME
+            self.accumulated_ns = 0
+        else:
+            self.accumulated_ns -= steps * self.step_ns
+        return steps
+
+    def skip(self) -> int:
+        """
+        Leaves the time since the last call unsimulated, like a wait while
+        nothing moves
+        @returns: the nanoseconds skipped
+        """
+        now = time.perf_counter_ns()
+        skipped_ns = now - self.last_time_ns
+        self.last_time_ns = now
+        return skipped_ns
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulated_ns / self.step_ns
+
+
+world_clock = WorldClock()
@@ -1,4 +1,5 @@
 import pygame
+from engine.events.bus import EventBus
 
 FACE_ACTIVATED = pygame.USEREVENT + 1
 FACE_ROTATING = pygame.USEREVENT + 2
@@ -25,9 +26,12 @@ FADED_OUT = pygame.USEREVENT + 28
 MUSIC_TRACK_END = pygame.USEREVENT + 30
 
 
-def emit_event(event_type: int, payload: any = {}):
-    evt = pygame.event.Event(event_type, payload)
-    pygame.event.post(evt)
+# Carries the game's own events, SDL's queue only carries OS input and the
+# soundtrack's MUSIC_TRACK_END
+event_bus = EventBus()
+
+def emit_event(event_type: int, payload: dict = None, immediate: bool = False):
+    event_bus.publish(event_type, payload, immediate)
 
 def block_events(type = None):
     pygame.event.set_blocked(type)
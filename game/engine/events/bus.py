@@ -0,0 +1,46 @@
+from collections import deque
+from engine.events.router import EventRouter
+
+
+class GameEvent:
+    """
+    An internal game event. It has the same type and payload attributes as
+    a pygame.event.Event, so handlers can take either.
+    """
+
+    def __init__(self, type: int, payload: dict = None):
+        self.type = type
+        if payload:
+            self.__dict__.update(payload)
+
+
+class EventBus(EventRouter):
+    """
+    Delivers internal game events to their subscribers without a trip
+    through the SDL event queue, which is left to OS input.
+
+    Published events wait for the next flush, unless they're published as
+    immediate. Events published while flushing are delivered in the same
+    flush, so chained reactions don't wait a frame. Immediate events with
+    no subscribers are dropped without being created.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pending = deque()
+        self.world_time = 0
+
+    def publish(self, event_type: int, payload: dict = None, immediate: bool = False):
+        if immediate:
+            if self.routes.get(event_type):
+                self.dispatch(GameEvent(event_type, payload), self.world_time)
+        else:
+            self.pending.append(GameEvent(event_type, payload))
+
+    def dispatch(self, event, world_time: int):
+        self.world_time = world_time
+        super().dispatch(event, world_time)
+
+    def flush(self, world_time: int):
+        while self.pending:
+            self.dispatch(self.pending.popleft(), world_time)
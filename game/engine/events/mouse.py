@@ -1,7 +1,7 @@
 import pygame
 import glm
+import numpy as np
 from constants.dimensions import SCREEN_DIMENSIONS
-from models.types import Vertex
 
 def screen_to_cartesian(screen_coordinates: tuple[int,int]):
     x = (2.0 * screen_coordinates[0]) / SCREEN_DIMENSIONS[0] - 1.0;
@@ -17,40 +17,84 @@ def clip_to_screen(clip_coordinates: glm.vec4):
     )
 
 
-def find_mouse_face(mouse_pos: tuple[int, int], faces: list[list[Vertex]]):
-    mouse_pos_vec = glm.vec2(mouse_pos)
-    for (face_ix, face) in enumerate(faces):
-        face_vec3 = [glm.vec3(vertex) for vertex in face]
-        face_normal = -glm.cross(face_vec3[1] - face_vec3[0], face_vec3[2] - face_vec3[0])
+def clip_array_to_screen(clip_coordinates: np.ndarray):
+    """
+    clip_to_screen for a whole (..., 4) array of clip coordinates at once
+    """
+    clip_coordinates = np.asarray(clip_coordinates, dtype="f8")
+    w = clip_coordinates[..., 3]
+    return np.stack([
+        (clip_coordinates[..., 0] * SCREEN_DIMENSIONS[0]) / (2.0 * w) + (SCREEN_DIMENSIONS[0] / 2),
+        (-1 * clip_coordinates[..., 1] * SCREEN_DIMENSIONS[1]) / (2.0 * w) + (SCREEN_DIMENSIONS[1] / 2),
+    ], axis=-1)
 
-        # Normals are reversed
-        if face_normal.z < 0:
-            continue
 
-        screen_vertices = [clip_to_screen(vertex) for vertex in face]
+class ScreenFaces:
+    """
+    Screen outlines of convex faces, set up once so the face under the
+    mouse can be looked up on every mouse event with a few array operations.
+    @param faces: (F, V, 4) clip coordinates of every face's corners. Every
+                  face has the same number of corners.
+    """
 
-        point_vertex_vectors = [screen_vertex - mouse_pos_vec for screen_vertex in screen_vertices]
-        angle_sum = 0
-        for (ix, vector) in enumerate(point_vertex_vectors):
-            next_ix = 0 if ix == len(point_vertex_vectors) - 1 else ix + 1
-            next_vector = point_vertex_vectors[next_ix]
-            angle = glm.acos(
-                glm.dot(
-                    glm.normalize(vector),
-                    glm.normalize(next_vector)
-                )
-            )
-            angle_sum += angle
+    def __init__(self, faces: np.ndarray):
+        screen_vertices = clip_array_to_screen(faces)
+        (x, y) = (screen_vertices[..., 0], screen_vertices[..., 1])
+        (next_x, next_y) = (np.roll(x, -1, axis=1), np.roll(y, -1, axis=1))
+
+        # Front faces wind clockwise on screen, with y pointing down
+        is_front_facing = np.sum(x * next_y - next_x * y, axis=1) > 0
+        self.face_indices = np.flatnonzero(is_front_facing)
+
+        # The edge function of the point (px, py) against the edge from
+        # (x, y) to (next_x, next_y) is edge_x * py - edge_y * px - offset
+        self.edge_x = (next_x - x)[is_front_facing]
+        self.edge_y = (next_y - y)[is_front_facing]
+        self.edge_offset = self.edge_x * y[is_front_facing] - self.edge_y * x[is_front_facing]
+
+    def find_face(self, mouse_pos: tuple[int, int]):
+        """
+        Index of the first front-facing face containing mouse_pos, or None
+        """
+        edge_functions = (
+            self.edge_x * mouse_pos[1] - self.edge_y * mouse_pos[0] - self.edge_offset
+        )
+        contains_mouse = np.flatnonzero((edge_functions >= 0).all(axis=1))
+        return int(self.face_indices[contains_mouse[0]]) if len(contains_mouse) > 0 else None
 
-        if abs(angle_sum - glm.two_pi()) < 0.1:
-            return face_ix
 
-    return None
+def find_mouse_face(mouse_pos: tuple[int, int], faces: np.ndarray):
+    return ScreenFaces(faces).find_face(mouse_pos)
+
+
+def coalesce_mouse_motion(events: list[pygame.event.Event]):
+    """
+    Collapse every run of back to back MOUSEMOTION events into its last
+    event, carrying the summed relative motion. Events of other types, and
+    so the motion between clicks, are kept in order.
+    """
+    coalesced = []
+    for event in events:
+        if (
+            event.type == pygame.MOUSEMOTION
+            and coalesced
+            and coalesced[-1].type == pygame.MOUSEMOTION
+        ):
+            previous = coalesced[-1]
+            rel = (previous.rel[0] + event.rel[0], previous.rel[1] + event.rel[1])
+            coalesced[-1] = pygame.event.Event(
+                pygame.MOUSEMOTION, {**event.__dict__, "rel": rel}
+            )
+        else:
+            coalesced.append(event)
+    return coalesced
 
 
 CLICK_MAX_TIME = 200 # ms
 
 class ClickDetector:
+    EVENT_TYPES = (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
     def __init__(self, on_click: callable):
         self.mouse_down_time = None
         self.mouse_button = None
@@ -67,7 +111,7 @@ class ClickDetector:
                 return
             if world_time - self.mouse_down_time < CLICK_MAX_TIME and event.button == self.mouse_button:
                 self.on_click(
-                    pygame.mouse.get_pos(),
+                    event.pos,
                     event.button
                 )
             self.mouse_down_time = None
@@ -0,0 +1,30 @@
+from collections import defaultdict
+import pygame
+
+
+class EventRouter:
+    """
+    Routing table from event types to the handlers subscribed to them, so an
+    event is only passed to the handlers that care about its type.
+    Handlers are called with (event, world_time) in the order they subscribed.
+    """
+
+    def __init__(self):
+        self.routes = defaultdict(list)
+
+    def subscribe(self, event_types, handler: callable):
+        for event_type in set(event_types):
+            self.routes[event_type].append(handler)
+
+    def unsubscribe(self, handler: callable):
+        for handlers in self.routes.values():
+            if handler in handlers:
+                handlers.remove(handler)
+
+    def dispatch(self, event: pygame.event.Event, world_time: int):
+        handlers = self.routes.get(event.type)
+        if not handlers:
+            return
+        # Copied, since a handler may change the subscriptions
+        for handler in tuple(handlers):
+            handler(event, world_time)
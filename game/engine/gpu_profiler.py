@@ -0,0 +1,134 @@
+import os
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import moderngl
+
+# Results are read back this many frames after they were drawn, when the GPU
+# is done with them, so reading them doesn't stall the frame being drawn
+FRAME_LATENCY = 1
+# Frames the printed averages are taken over
+REPORT_FRAMES = 120
+
+
+class GpuFrame:
+    """
+    The timer queries of one frame in the ring. The queries are kept and
+    reused when the ring comes back around to the frame.
+    """
+
+    def __init__(self):
+        self.queries = []
+        # The section path each of the used queries timed
+        self.paths = []
+
+    @property
+    def used_queries(self):
+        return zip(self.queries, self.paths)
+
+
+class GpuProfiler:
+    """
+    Times sections of the render on the GPU with timer queries, when
+    GPU_PROFILE=1. Sections nest, and are named by their path, like
+    "polyhedron/terrain".
+
+    GL can't time with two queries at once, so a section stops the query of
+    the section it's in and starts a new one for it once it's done. The time
+    of a section includes the sections inside it.
+
+    Every GPU_PROFILE_FRAMES frames the average times of the sections are
+    printed, averages holds the last of them in ms.
+    """
+
+    def __init__(self):
+        self.is_enabled = os.environ.get("GPU_PROFILE", None) == "1"
+        self.report_frames = int(os.environ.get("GPU_PROFILE_FRAMES", REPORT_FRAMES))
+        self.ctx = None
+
+        self.frames = [GpuFrame() for _ in range(FRAME_LATENCY + 1)]
+        self.frame_index = 0
+        self.stack = []
+        self.active_query = None
+
+        self.totals = defaultdict(int)
+        self.collected_frames = 0
+        self.averages = {}
+
+    def use_context(self, ctx: moderngl.Context):
+        self.ctx = ctx
+
+    @property
+    def current_frame(self) -> GpuFrame:
+        return self.frames[self.frame_index % len(self.frames)]
+
+    def __start_query(self):
+        frame = self.current_frame
+        if len(frame.paths) == len(frame.queries):
+            frame.queries.append(self.ctx.query(time=True))
+        self.active_query = frame.queries[len(frame.paths)]
+        frame.paths.append("/".join(self.stack))
+        self.active_query.__enter__()
+
+    def __stop_query(self):
+        self.active_query.__exit__(None, None, None)
+        self.active_query = None
+
+    @contextmanager
+    def __section(self, name: str):
+        if self.active_query is not None:
+            self.__stop_query()
+        self.stack.append(name)
+        self.__start_query()
+        try:
+            yield
+        finally:
+            self.__stop_query()
+            self.stack.pop()
+            if len(self.stack) > 0:
+                self.__start_query()
+
+    def section(self, name: str):
+        """
+        Use as with gpu_profiler.section("skybox"): around the draw calls
+        """
+        if not self.is_enabled or self.ctx is None:
+            return nullcontext()
+        return self.__section(name)
+
+    def end_frame(self):
+        """
+        Moves on to the next frame in the ring, collecting the results of the
+        frame that was there
+        """
+        if not self.is_enabled:
+            return
+        self.frame_index += 1
+        frame = self.current_frame
+        if len(frame.paths) > 0:
+            for (query, path) in frame.used_queries:
+                self.totals[path] += query.elapsed
+            frame.paths = []
+            self.collected_frames += 1
+        if self.collected_frames == self.report_frames:
+            self.__report()
+
+    def __report(self):
+        # In the order the sections were first drawn, parents before children
+        averages = defaultdict(float)
+        for (path, total) in self.totals.items():
+            names = path.split("/")
+            for depth in range(1, len(names) + 1):
+                averages["/".join(names[:depth])] += total / self.collected_frames / 1_000_000
+        self.averages = dict(averages)
+
+        print(f"GPU ms per frame, over {self.collected_frames} frames")
+        for (path, average) in self.averages.items():
+            name = "  " * path.count("/") + path.split("/")[-1]
+            print(f"  {name:<24}{average:8.3f}")
+
+        self.totals = defaultdict(int)
+        self.collected_frames = 0
+
+
+gpu_profiler = GpuProfiler()
@@ -0,0 +1,22 @@
+import os
+import moderngl
+
+
+def init_headless():
+    """
+    Points SDL at its dummy video and audio drivers and Mesa at its software
+    rasterizer, for machines without a display or a GPU. Call it before
+    pygame is initialized, and before importing anything that starts the
+    mixer.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+
+
+def create_headless_context() -> moderngl.Context:
+    try:
+        return moderngl.create_context(standalone=True, backend="egl", require=330)
+    except Exception:
+        # No EGL, try the platform's own offscreen context
+        return moderngl.create_context(standalone=True, require=330)
@@ -0,0 +1,90 @@
+import weakref
+
+import moderngl
+
+TRIANGLE_COUNTS = {
+    moderngl.TRIANGLES: lambda vertices: vertices // 3,
+    moderngl.TRIANGLE_STRIP: lambda vertices: max(vertices - 2, 0),
+    moderngl.TRIANGLE_FAN: lambda vertices: max(vertices - 2, 0),
+}
+
+# The Context methods that allocate memory on the GPU
+ALLOCATING_METHODS = ("buffer", "texture", "depth_texture", "renderbuffer", "depth_renderbuffer")
+
+
+def _allocated_bytes(gl_object) -> int:
+    if isinstance(gl_object, moderngl.Buffer):
+        return gl_object.size
+    (width, height) = gl_object.size
+    item_size = int(gl_object.dtype[1:])
+    return width * height * gl_object.components * item_size * max(gl_object.samples, 1)
+
+
+class RenderStats:
+    """
+    Counts the draw calls and the triangles they submit, and the memory of
+    the buffers and textures that haven't been released. moderngl keeps no
+    count of these, so install wraps its methods to take them.
+
+    Nothing is wrapped until install is called, the performance HUD does so
+    before the Stage makes any gl objects.
+    """
+
+    def __init__(self):
+        self.is_installed = False
+        self.draw_calls = 0
+        self.triangles = 0
+        # The counts of the last frame, set by end_frame
+        self.frame_draw_calls = 0
+        self.frame_triangles = 0
+        # (weak reference, bytes) of every gl object allocated since install
+        self.allocations = []
+
+    def install(self):
+        if self.is_installed:
+            return
+        self.is_installed = True
+
+        render = moderngl.VertexArray.render
+
+        def counted_render(vertex_array, mode=None, vertices=-1, first=0, instances=-1):
+            self.draw_calls += 1
+            count = TRIANGLE_COUNTS.get(vertex_array.mode if mode is None else mode)
+            if count is not None:
+                vertex_count = vertex_array.vertices if vertices < 0 else vertices
+                self.triangles += count(vertex_count) * max(instances, 1)
+            return render(vertex_array, mode, vertices, first, instances)
+
+        moderngl.VertexArray.render = counted_render
+        for method_name in ALLOCATING_METHODS:
+            self.__track_allocations(method_name)
+
+    def __track_allocations(self, method_name: str):
+        allocate = getattr(moderngl.Context, method_name)
+
+        def tracked_allocate(ctx, *args, **kwargs):
+            gl_object = allocate(ctx, *args, **kwargs)
+            self.allocations.append((weakref.ref(gl_object), _allocated_bytes(gl_object)))
+            return gl_object
+
+        setattr(moderngl.Context, method_name, tracked_allocate)
+
+    def end_frame(self):
+        self.frame_draw_calls = self.draw_calls
+        self.frame_triangles = self.triangles
+        self.draw_calls = 0
+        self.triangles = 0
+
+    @property
+    def gl_memory(self) -> int:
+        """
+        @returns: the bytes of the buffers and textures still alive
+        """
+        self.allocations = [
+            (reference, size) for (reference, size) in self.allocations
+            if reference() is not None and not isinstance(reference().mglo, moderngl.InvalidObject)
+        ]
+        return sum(size for (_reference, size) in self.allocations)
+
+
+render_stats = RenderStats()
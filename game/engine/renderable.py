@@ -1,6 +1,9 @@
 import pygame
 
 class Renderable:
+    # The event types handle_event needs to see
+    EVENT_TYPES = ()
+
     def handle_event(self, event: pygame.event.Event, world_time: int):
         """
         handle any incoming events before the render
@@ -8,6 +11,13 @@ class Renderable:
         """
         pass
 
+    def update(self, delta_time: float):
+        """
+        Advance game logic by one fixed simulation step
+        @param delta_time: the length of a step in milliseconds
+        """
+        pass
+
     def render(self, delta_time: int):
         """
         Render objects to the context.
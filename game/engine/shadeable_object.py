@@ -1,7 +1,7 @@
 from typing import Union
 import numpy as np
 import moderngl
-from engine.shader import get_shader_program
+from engine.shader import get_shader_program, release_shader_program
 
 
 class ShadeableObject:
@@ -34,6 +34,9 @@ class ShadeableObject:
         else:
             self.shader = shader
             self.is_own_shader = False
+        # Programs are shared, so uniforms set through set_uniform are kept
+        # here and written again before every render
+        self.uniforms = {}
         self.vbo = self.__make_vbo(ctx, shader_vertices)
 
         input_sizes = []
@@ -51,6 +54,8 @@ class ShadeableObject:
         values in uniform dict must be non-primitives.
         if you have a primative (int, float), store it in glm.vect(1)
         """
+        for key, val in self.uniforms.items():
+            self.__write_uniform(key, val)
         if uniforms is not None:
           for key, val in uniforms.items():
               self.shader[key].write(val)
@@ -62,11 +67,18 @@ class ShadeableObject:
     def __make_vbo(self, ctx, vertices):
         return ctx.buffer(np.array(vertices, dtype="f4"))
 
+    def __write_uniform(self, uniform_name: str, uniform_value):
+        if isinstance(uniform_value, (bool, int, float)):
+            self.shader[uniform_name].value = uniform_value
+        else:
+            self.shader[uniform_name].write(uniform_value)
+
     def set_uniform(self, uniform_name: str, uniform_value):
-        self.shader[uniform_name].write(uniform_value)
+        self.uniforms[uniform_name] = uniform_value
+        self.__write_uniform(uniform_name, uniform_value)
 
     def destroy(self):
         self.vbo.release()
         self.vao.release()
         if self.is_own_shader:
-            self.shader.release()
+            release_shader_program(self.shader)
@@ -1,8 +1,13 @@
+import hashlib
 import os
 import moderngl
+from engine.trace import tracer
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
+# (ctx, shader names, source hash) -> [program, reference count]
+_programs = {}
+
 
 def _get_shader_file(file_name):
   file_path = os.path.join(dir_path, 'shaders', file_name)
@@ -11,13 +16,47 @@ def _get_shader_file(file_name):
   with open(file_path, 'r') as file:
     return file.read()
 
-def get_shader_program(ctx: moderngl.Context, shader_name: str):
+def _source_hash(*sources):
+  digest = hashlib.sha1()
+  for source in sources:
+    digest.update(b'\0' if source is None else source.encode('utf-8'))
+  return digest.hexdigest()
+
+def get_shader_program(ctx: moderngl.Context, shader_name: str, fragment_shader_name: str = None):
+  """
+  Returns a program shared by everyone asking for the same shader sources.
+  Uniform values are shared along with it, so write the ones you depend on
+  before every render. Give it back with release_shader_program.
+  """
+  fragment_shader_name = fragment_shader_name or shader_name
   vertex_shader = _get_shader_file(f"{shader_name}.vert")
-  fragment_shader = _get_shader_file(f"{shader_name}.frag")
+  fragment_shader = _get_shader_file(f"{fragment_shader_name}.frag")
   geometry_shader = _get_shader_file(f"{shader_name}.geom")
-  program = ctx.program(
-      vertex_shader=vertex_shader,
-      geometry_shader=geometry_shader,
-      fragment_shader=fragment_shader
+
+  key = (
+    ctx,
+    shader_name,
+    fragment_shader_name,
+    _source_hash(vertex_shader, fragment_shader, geometry_shader),
   )
-  return program
\ No newline at end of file
+  entry = _programs.get(key)
+  if entry is None:
+    with tracer.span("compile shader", "shader", shader=shader_name, fragment_shader=fragment_shader_name):
+      program = ctx.program(
+          vertex_shader=vertex_shader,
+          geometry_shader=geometry_shader,
+          fragment_shader=fragment_shader
+      )
+    entry = _programs[key] = [program, 0]
+  entry[1] += 1
+  return entry[0]
+
+def release_shader_program(program: moderngl.Program):
+  for (key, entry) in _programs.items():
+    if entry[0] is program:
+      entry[1] -= 1
+      if entry[1] == 0:
+        del _programs[key]
+        program.release()
+      return
+  program.release()
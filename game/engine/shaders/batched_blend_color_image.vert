@@ -0,0 +1,19 @@
+#version 330 core
+
+layout(location=0)in vec2 in_textcoord_0;
+layout(location=1)in vec3 in_position;
+layout(location=2)in float in_face;
+
+out vec2 uv_0;
+
+layout(std140)uniform FaceTransforms{
+  mat4 m_faces[20];
+  vec4 v_face_normals[20];
+};
+
+uniform mat4 m_mvp;
+
+void main(){
+  uv_0=in_textcoord_0;
+  gl_Position=m_mvp*m_faces[int(in_face)]*vec4(in_position,1.);
+}
@@ -0,0 +1,14 @@
+#version 330 core
+
+layout(location=0)in vec2 in_textcoord_0;
+layout(location=1)in vec3 in_position;
+layout(location=2)in float in_face;
+
+out vec2 uv;
+flat out int face;
+
+void main(){
+    uv=in_textcoord_0;
+    face=int(in_face);
+    gl_Position=vec4(in_position,1.);
+}
@@ -0,0 +1,15 @@
+#version 330 core
+
+layout(location=1)in vec3 in_position;
+layout(location=2)in float in_face;
+
+layout(std140)uniform FaceTransforms{
+  mat4 m_faces[20];
+  vec4 v_face_normals[20];
+};
+
+uniform mat4 m_mvp;
+
+void main(){
+  gl_Position=m_mvp*m_faces[int(in_face)]*vec4(in_position,1.);
+}
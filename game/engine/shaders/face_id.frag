@@ -0,0 +1,10 @@
+#version 330 core
+
+// 0 is left for the background
+layout (location = 0) out int face_id;
+
+flat in int face;
+
+void main() {
+  face_id = face + 1;
+}
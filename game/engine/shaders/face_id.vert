@@ -0,0 +1,14 @@
+#version 330 core
+
+layout(location=0)in vec3 in_position;
+layout(location=1)in float in_face;
+
+flat out int face;
+
+uniform mat4 m_mvp;
+uniform mat4 m_faces[20];
+
+void main(){
+  face=int(in_face);
+  gl_Position=m_mvp*m_faces[face]*vec4(in_position,1.);
+}
@@ -0,0 +1,12 @@
+#version 330 core
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uv_0;
+in vec4 color;
+
+uniform sampler2D u_texture_0;
+
+void main() {
+  fragColor = color * texture(u_texture_0, uv_0);
+}
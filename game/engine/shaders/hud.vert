@@ -0,0 +1,17 @@
+#version 330 core
+
+layout(location=0)in vec2 in_position;
+layout(location=1)in vec2 in_textcoord_0;
+layout(location=2)in vec4 in_color;
+
+out vec2 uv_0;
+out vec4 color;
+
+// Positions are in pixels from the top left of the screen
+uniform vec2 u_screen;
+
+void main(){
+  uv_0=in_textcoord_0;
+  color=in_color;
+  gl_Position=vec4(in_position.x/u_screen.x*2.-1.,1.-in_position.y/u_screen.y*2.,0.,1.);
+}
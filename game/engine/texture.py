@@ -1,6 +1,7 @@
 import os
 import pygame
 import moderngl
+from engine.trace import tracer
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
 
@@ -14,19 +15,35 @@ def get_texture(ctx: moderngl.Context, texture_filename: str):
     else:
         return _get_texture_by_filename(ctx, texture_filename)
 
+def get_surface_texture(ctx: moderngl.Context, texture_name: str, surface: pygame.Surface):
+    """
+    Uploads a surface made in game once, and hands it out under its name
+    like the textures loaded from files
+    """
+    if texture_name in texture_atlas:
+        return texture_atlas[texture_name]
+    return _make_texture(ctx, texture_name, surface)
+
 def _get_texture_by_filename(ctx: moderngl.Context, texture_filename: str):
-    global _next_texture_location
     path = os.path.join(dir_path, '..','assets','textures',texture_filename)
-    texture_surface = pygame.image.load(path).convert_alpha()
-    texture_surface = pygame.transform.flip(texture_surface, flip_x=False, flip_y=True)
-    texture = ctx.texture(
-        size=texture_surface.get_size(),
-        components=4,
-        data=pygame.image.tostring(texture_surface, 'RGBA')
-    )
+    with tracer.span("load texture", "texture", texture=texture_filename):
+        texture_surface = pygame.image.load(path).convert_alpha()
+    return _make_texture(ctx, texture_filename, texture_surface)
+
+def _make_texture(ctx: moderngl.Context, texture_name: str, surface: pygame.Surface):
+    global _next_texture_location
+    with tracer.span("convert texture", "texture", texture=texture_name):
+        texture_surface = pygame.transform.flip(surface, flip_x=False, flip_y=True)
+        texture_data = pygame.image.tostring(texture_surface, 'RGBA')
+    with tracer.span("upload texture", "texture", texture=texture_name):
+        texture = ctx.texture(
+            size=texture_surface.get_size(),
+            components=4,
+            data=texture_data
+        )
     texture_location = _next_texture_location
     texture.use(location=texture_location)
-    texture_atlas[texture_filename] = (texture, texture_location)
+    texture_atlas[texture_name] = (texture, texture_location)
     _next_texture_location = _next_texture_location + 1
     return (texture, texture_location)
 
@@ -0,0 +1,86 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_no_span = nullcontext()
+
+
+class Tracer:
+    """
+    Records spans of time as Chrome trace events, when TRACE_FILE is set to
+    the path to write them to on exit. Open the file in chrome://tracing or
+    ui.perfetto.dev to see the spans on a timeline, nested as they were
+    called.
+
+    When it isn't set spans are a shared do-nothing context manager, and
+    traced hands back the function it was given.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.is_enabled = path is not None
+        self.events = []
+        self.start_time = time.perf_counter_ns()
+        self.pid = os.getpid()
+        if self.is_enabled:
+            atexit.register(self.save)
+
+    def __record(self, name: str, category: str, start: int, end: int, args: dict):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            # Trace events count in microseconds
+            "ts": (start - self.start_time) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    @contextmanager
+    def __span(self, name: str, category: str, args: dict):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.__record(name, category, start, time.perf_counter_ns(), args)
+
+    def span(self, name: str, category: str = "game", **args):
+        """
+        Use as with tracer.span("load level", level=2): around the work. The
+        keyword arguments show up with the span
+        """
+        if not self.is_enabled:
+            return _no_span
+        return self.__span(name, category, args)
+
+    def traced(self, name: str = None, category: str = "game"):
+        """
+        Decorates a function to record a span of every call, named after the
+        function unless given a name
+        """
+        def decorate(function):
+            if not self.is_enabled:
+                return function
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def traced_function(*args, **kwargs):
+                with self.__span(span_name, category, None):
+                    return function(*args, **kwargs)
+            return traced_function
+        return decorate
+
+    def save(self):
+        with open(self.path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
+
+
+tracer = Tracer(os.environ.get("TRACE_FILE", None))
@@ -0,0 +1,141 @@
+"""
+Runs the Stage without a window or a GPU, for benchmarks and smoke tests
+on machines without a display.
+
+The frames are drawn into an offscreen framebuffer of an EGL context, on
+Mesa's llvmpipe software rasterizer unless LIBGL_ALWAYS_SOFTWARE says
+otherwise. Input comes from a script of events instead of SDL, and the
+simulation advances by a fixed frame time instead of the wall clock, so
+every run of a script plays out the same.
+
+engine.headless.init_headless has to run before this is imported, as
+importing the Stage starts the mixer. HEADLESS=1 python main.py does both.
+"""
+import json
+import time
+from collections import defaultdict
+import moderngl
+import pygame
+from constants.colors import Colors
+from constants.dimensions import SCREEN_DIMENSIONS
+from engine.clock import world_clock, FixedTimestep, SIMULATION_STEP_MS
+from engine.gpu_profiler import gpu_profiler
+from engine.headless import create_headless_context
+from stage import Stage
+
+FRAME_TIME_NS = 1_000_000_000 // 60
+
+
+class ScriptedEvents:
+    """
+    Input for a headless run. A script is a list of
+    [frame, event name, attributes] entries, for example
+    [120, "MOUSEBUTTONDOWN", {"pos": [300, 300], "button": 1}]
+    """
+
+    def __init__(self, script: list):
+        self.frames = defaultdict(list)
+        for (frame, event_name, attributes) in script:
+            attributes = {
+                name: tuple(value) if isinstance(value, list) else value
+                for (name, value) in attributes.items()
+            }
+            self.frames[frame].append(pygame.event.Event(getattr(pygame, event_name), attributes))
+
+    @staticmethod
+    def from_file(path: str):
+        with open(path, "r") as file:
+            return ScriptedEvents(json.load(file))
+
+    @property
+    def last_frame(self) -> int:
+        return max(self.frames, default=0)
+
+    def get(self, frame: int) -> list[pygame.event.Event]:
+        # SDL still delivers the soundtrack's MUSIC_TRACK_END
+        return self.frames.get(frame, []) + pygame.event.get()
+
+
+class HeadlessRunner:
+    """
+    When timed, every frame appends to frame_timings the nanoseconds its
+    events, simulation steps and render took on the CPU, the wait for the
+    GPU to finish the frame after that, and the render's own GPU time.
+    On a software rasterizer the drawing happens during the wait, and the
+    GPU time only covers handing the commands over.
+    """
+
+    def __init__(
+        self,
+        events: ScriptedEvents = None,
+        frame_time_ns: int = FRAME_TIME_NS,
+        is_timed: bool = False,
+    ):
+        if is_timed and gpu_profiler.is_enabled:
+            # GL can't time the whole render and its sections at once
+            raise ValueError("Timed runs can't be profiled with GPU_PROFILE")
+
+        # The dummy display is still needed to convert loaded images
+        pygame.display.set_mode(SCREEN_DIMENSIONS)
+
+        self.ctx = create_headless_context()
+        self.ctx.enable(flags=moderngl.DEPTH_TEST | moderngl.BLEND | moderngl.PROGRAM_POINT_SIZE)
+        self.framebuffer = self.ctx.simple_framebuffer(SCREEN_DIMENSIONS)
+        self.framebuffer.use()
+
+        self.stage = Stage(self.ctx)
+        self.events = events if events is not None else ScriptedEvents([])
+
+        self.timestep = FixedTimestep()
+        self.frame_time_ns = frame_time_ns
+        self.frame = 0
+
+        self.is_timed = is_timed
+        self.frame_timings = []
+        self.gpu_query = self.ctx.query(time=True) if is_timed else None
+
+    def step(self):
+        events = self.events.get(self.frame)
+        start = time.perf_counter_ns()
+        self.stage.handle_events(events, world_clock.time)
+        events_done = time.perf_counter_ns()
+        for _ in range(self.timestep.steps(self.frame_time_ns)):
+            self.stage.update(SIMULATION_STEP_MS)
+            world_clock.advance(SIMULATION_STEP_MS)
+        world_clock.alpha = self.timestep.alpha
+        update_done = time.perf_counter_ns()
+
+        self.framebuffer.use()
+        self.ctx.clear(color=Colors.WHITE)
+        if self.is_timed:
+            with self.gpu_query:
+                self.stage.render(self.frame_time_ns / 1_000_000)
+            render_done = time.perf_counter_ns()
+            self.ctx.finish()
+            finish_done = time.perf_counter_ns()
+            self.frame_timings.append({
+                "events": events_done - start,
+                "update": update_done - events_done,
+                "render": render_done - update_done,
+                "finish": finish_done - render_done,
+                "gpu": self.gpu_query.elapsed,
+            })
+        else:
+            self.stage.render(self.frame_time_ns / 1_000_000)
+        self.frame += 1
+
+    def run(self, frames: int):
+        for _ in range(frames):
+            self.step()
+
+    def screenshot(self) -> pygame.Surface:
+        pixels = self.framebuffer.read(components=3)
+        # GL rows start at the bottom
+        return pygame.transform.flip(
+            pygame.image.frombuffer(pixels, SCREEN_DIMENSIONS, "RGB"), False, True
+        )
+
+    def destroy(self):
+        self.stage.destroy()
+        self.framebuffer.release()
+        self.ctx.release()
@@ -1,3 +1,15 @@
+import os
+from dotenv import load_dotenv
+from engine.headless import init_headless
+
+load_dotenv()
+
+# HEADLESS=1 renders offscreen, without a window, from a script of input
+# events. See headless_runner.py
+IS_HEADLESS = os.environ.get("HEADLESS", None) == "1"
+if IS_HEADLESS:
+    init_headless()
+
 import pygame
 import moderngl as mgl
 from constants.dimensions import SCREEN_DIMENSIONS
@@ -11,11 +23,12 @@ from scenes.test_scene import TestScene
 from ui.fader import Fader
 from ui.intro_plane import IntroPlane
 from engine.events import PUZZLE_SOLVED, SCENE_FINISH
-from dotenv import load_dotenv
-
-load_dotenv()
+from engine.clock import world_clock, FixedTimestep, SIMULATION_STEP_MS
+from headless_runner import HeadlessRunner, ScriptedEvents
 
-MAX_FPS = 60
+# MAX_FPS caps the rendered frame rate, 0 leaves it uncapped. The game
+# logic steps at a fixed rate either way.
+MAX_FPS = int(os.environ.get("MAX_FPS", 60))
 
 # Setup
 pygame.init()
@@ -43,29 +56,69 @@ class Main:
         self.delta_time = 0
         self.world_time = 0
 
+        # IDLE_RENDERING=1 stops drawing frames while nothing moves, and
+        # waits for the next event instead
+        self.is_idle_rendering = os.environ.get("IDLE_RENDERING", None) == "1"
+        self.waiting_events = []
+
+        self.timestep = FixedTimestep()
+
     def quit(self):
         self.scene.destroy()
         pygame.quit()
         exit()
 
     def handle_events(self) -> None:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.quit()
-            else:
-                self.stage.handle_event(event, self.world_time)
+        events = self.waiting_events + pygame.event.get()
+        self.waiting_events = []
+        if any(event.type == pygame.QUIT for event in events):
+            self.quit()
+        self.stage.handle_events(events, self.world_time)
 
     def render(self) -> None:
         self.ctx.clear(color=Colors.WHITE)
         self.stage.render(self.delta_time)
         pygame.display.flip()
 
+    def wait(self) -> None:
+        # Blocks until input arrives or the soundtrack's track ends
+        self.waiting_events.append(pygame.event.wait())
+        # Nothing moved while waiting, so the wait isn't simulated, but the
+        # world clock keeps real time for input
+        world_clock.advance(self.timestep.skip() / 1_000_000)
+
+    def update(self) -> None:
+        for _ in range(self.timestep.steps()):
+            self.stage.update(SIMULATION_STEP_MS)
+            world_clock.advance(SIMULATION_STEP_MS)
+        world_clock.alpha = self.timestep.alpha
+        self.delta_time = self.timestep.frame_time_ns / 1_000_000
+
     def run(self):
         while True:
             self.handle_events()
+            self.update()
             self.render()
-            self.delta_time = clock.tick(MAX_FPS)
-            self.world_time += self.delta_time
+            if self.is_idle_rendering and self.stage.is_idle():
+                self.wait()
+            else:
+                clock.tick(MAX_FPS)
+            self.world_time = world_clock.time
+
+
+def run_headless():
+    script_path = os.environ.get("HEADLESS_SCRIPT", None)
+    events = ScriptedEvents.from_file(script_path) if script_path else None
+    runner = HeadlessRunner(events)
+    runner.run(int(os.environ.get("HEADLESS_FRAMES", 600)))
+    screenshot_path = os.environ.get("HEADLESS_SCREENSHOT", None)
+    if screenshot_path:
+        pygame.image.save(runner.screenshot(), screenshot_path)
+    runner.destroy()
+    pygame.quit()
 
 
-Main().run()
+if IS_HEADLESS:
+    run_headless()
+else:
+    Main().run()
@@ -8,12 +8,14 @@ from engine.vectors import normalize_vector
 from engine.renderable import Renderable
 from engine.camera import Camera
 from engine.shader import get_shader_program
-from engine.animation import AnimationLerper, AnimationLerpFunction, Animator
+from engine.animation import AnimationLerper, AnimationLerpFunction, Animator, AnimationSystem
 from engine.events import emit_event, FACE_ROTATED, block_events, allow_events
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
 from puzzles.face_generator_definition import FaceGeneratorDefinition
 from puzzles.puzzle_face import PuzzleFace
 from models.types import Vertex, UV
-from models.helpers import merge_collection_items
+from models.helpers import merge_collection_items, index_vertices
 
 UNDERSIDE_NUDGE = (
     0.99  # To make sure there's not an overlap that causes rendering weirdness
@@ -79,6 +81,11 @@ class FaceCoordinateSystem:
 
         self.rotation_angle = 360 / face_generator_definition.num_segments
 
+        # Rows map homogeneous (u, v, 1) coordinates onto the face
+        self.uv_transform = np.array(
+            [self.u_vector, self.v_vector, self.origin_vector], dtype="f8"
+        )
+
     def _vector_outside_clip_bounds(self, vector: np.ndarray):
         for plane_ix, plane_normal in enumerate(self.clip_plane_normals):
             # Equation of a plane: Ax + By + Cz + D = 0
@@ -87,9 +94,11 @@ class FaceCoordinateSystem:
                 return plane_ix
         return None
 
+    def sink_multiplier(self, sink_depth: float):
+        return (FACE_NORMAL_DISTANCE - sink_depth) / FACE_NORMAL_DISTANCE
+
     def sink_vector(self, vector, sink_depth: float):
-        sink_multiplier = (FACE_NORMAL_DISTANCE - sink_depth) / FACE_NORMAL_DISTANCE
-        return vector * sink_multiplier
+        return vector * self.sink_multiplier(sink_depth)
 
     def uv_coordinates_to_face_coordinates(self, uv_coordinates: UV, sink_depth=0):
         local_vector = np.add(
@@ -103,6 +112,17 @@ class FaceCoordinateSystem:
 
         return local_vector
 
+    def uv_array_to_face_coordinates(self, uv_array: np.ndarray, sink_depth=0):
+        """
+        uv_coordinates_to_face_coordinates for a whole (N, 2) array of uv
+        coordinates at once, returning an (N, 3) array
+        """
+        uv_array = np.asarray(uv_array, dtype="f8").reshape(-1, 2)
+        transform = self.uv_transform
+        if sink_depth != 0:
+            transform = transform * self.sink_multiplier(sink_depth)
+        return uv_array @ transform[:2] + transform[2]
+
 
 
 class Face(Renderable):
@@ -115,8 +135,14 @@ class Face(Renderable):
         carve_shader: moderngl.Program,
         wall_shader: moderngl.Program,
         underside_shader: moderngl.Program,
+        wall_color: glm.vec4,
+        underside_color: glm.vec4,
+        is_batched: bool = False,
+        animation_system: AnimationSystem = None,
     ):
         self.face_vertices = face_vertices
+        self.wall_color = wall_color
+        self.underside_color = underside_color
 
         self.generator_definition = puzzle_face.generator_definition
         self.coordinate_system = FaceCoordinateSystem(
@@ -127,43 +153,25 @@ class Face(Renderable):
 
         self.rot_matrix = glm.mat4()
         self.pull_matrix = glm.mat4()
-
-        self.is_puzzle_solved = False
-
-        (terrain_vertices, terrain_uvs) = self.__make_terrain_vertices()
-        self.terrain_shader_ref = terrain_shader
-        self.terrain_buffer = self.__make_vbo_with_uv(ctx, terrain_vertices, terrain_uvs)
-        self.terrain_vertex_array = self.__make_vao(
-            ctx,
-            self.terrain_shader_ref,
-            [(self.terrain_buffer, "2f 3f", "in_textcoord_0", "in_position")],
+        # Homogeneous face corners, for projecting with numpy
+        self.corner_vertices = np.array(
+            [(*vertex, 1.0) for vertex in face_vertices], dtype="f8"
         )
 
-        [
-            carve_vertices,
-            wall_vertices,
-            underside_vertices,
-            carve_uvs,
-        ] = self.__make_carve_vertices()
-        self.has_carvings = len(carve_vertices) > 0
-        if self.has_carvings:
-            self.carve_shader_ref = carve_shader
-            self.carve_buffer = self.__make_vbo_with_uv(ctx, carve_vertices, carve_uvs)
-            self.carve_vertex_array = self.__make_vao(
-                ctx, self.carve_shader_ref, [(self.carve_buffer, "2f 3f", "in_textcoord_0", "in_position")]
-            )
-
-            self.wall_shader_ref = wall_shader
-            self.wall_buffer = self.__make_vbo(ctx, wall_vertices)
-            self.wall_vertex_array = self.__make_vao(
-                ctx, self.wall_shader_ref, [(self.wall_buffer, "3f", "in_position")]
-            )
+        self.is_puzzle_solved = False
 
-        self.underside_shader_ref = underside_shader
-        self.underside_buffer = self.__make_vbo(ctx, underside_vertices)
-        self.underside_vertex_array = self.__make_vao(
-            ctx, self.underside_shader_ref, [(self.underside_buffer, "3f", "in_position")]
-        )
+        with tracer.span("build face meshes", "mesh", face=puzzle_face.face_idx):
+            self._make_terrain_mesh()
+            underside_inner_vertices = self._make_carve_meshes()
+            self._make_underside_mesh(underside_inner_vertices)
+
+        # A FaceBatch draws batched faces, so they keep no gl objects of their own
+        self.is_batched = is_batched
+        if not is_batched:
+            with tracer.span("upload face meshes", "upload", face=puzzle_face.face_idx):
+                self.__make_buffers(
+                    ctx, terrain_shader, carve_shader, wall_shader, underside_shader
+                )
 
         self.nv = glm.vec3(self.coordinate_system.normal_vector)
         self.rotation_animator = Animator(
@@ -172,7 +180,9 @@ class Face(Renderable):
                 ROTATION_DURATION,
             ),
             start_value=0,
+            on_frame=self.__rotate_by_rotations,
             on_stop=self.__stop_rotation,
+            system=animation_system,
         )
         self.pull_animator = Animator(
             lerper=AnimationLerper(
@@ -180,80 +190,91 @@ class Face(Renderable):
                 PULL_DURATION,
             ),
             start_value=0,
+            on_frame=self.__pull_by_distance,
+            on_stop=self.__pull_by_distance,
+            system=animation_system,
         )
 
+    # The mesh building phases, kept apart so benchmarks.puzzle_load can time them
+
+    def _make_terrain_mesh(self):
+        (terrain_vertices, terrain_uvs) = self.__make_terrain_vertices()
+        self.terrain_mesh = merge_collection_items(terrain_uvs, terrain_vertices)
+
+    def _make_carve_meshes(self):
+        """
+        Makes the carve and wall meshes
+        @returns: the top and basin vertex of every outer ring node, for the underside
+        """
+        [
+            carve_vertices,
+            wall_vertices,
+            carve_uvs,
+            underside_inner_vertices,
+        ] = self.__make_carve_vertices()
+        self.has_carvings = len(carve_vertices) > 0
+        if self.has_carvings:
+            self.carve_mesh = merge_collection_items(carve_uvs, carve_vertices)
+            self.wall_mesh = np.asarray(wall_vertices, dtype="f4")
+        return underside_inner_vertices
+
+    def _make_underside_mesh(self, underside_inner_vertices):
+        underside_vertices = self.__make_underside_vertices(underside_inner_vertices)
+        self.underside_mesh = np.asarray(underside_vertices, dtype="f4")
+
     def __make_terrain_vertices(self):
-        polygons = self.puzzle_face.polygons
-        polygon_vertices = []
-        polygon_uvs = []
         # Render polygons on outside faces
-        for polygon in polygons:
-            if polygon.is_active:
-                continue
-            for node in polygon.nodes:
-                polygon_vertices.append(
-                    self.coordinate_system.uv_coordinates_to_face_coordinates(
-                        node.uv_coordinates
-                    )
-                )
-                polygon_uvs.append(node.uv_coordinates)
+        polygon_uvs = self.puzzle_face.terrain_uvs()
+        polygon_vertices = self.coordinate_system.uv_array_to_face_coordinates(
+            polygon_uvs
+        )
         return (polygon_vertices, polygon_uvs)
 
     def __make_carve_vertices(self):
-        active_polygons = self.puzzle_face.active_polygons
-        active_polygon_vertices = []
-        active_polygon_uvs = []
-        wall_vertices = []
+        coordinate_system = self.coordinate_system
+        # basin
+        active_polygon_uvs = self.puzzle_face.carve_uvs()
+        top_vertices = coordinate_system.uv_array_to_face_coordinates(active_polygon_uvs)
+        active_polygon_vertices = coordinate_system.sink_vector(top_vertices, CARVE_DEPTH)
+
+        # The first basin vertex found for every node on the outer ring
         underside_inner_vertices = [
             None
         ] * self.generator_definition.vertex_count_for_ring(self.depth)
-        for polygon in active_polygons:
-            # basin
-            for node in polygon.nodes:
-                top_coordinates = (
-                    self.coordinate_system.uv_coordinates_to_face_coordinates(
-                        node.uv_coordinates
-                    )
-                )
-                bottom_coordinates = (
-                    self.coordinate_system.uv_coordinates_to_face_coordinates(
-                        node.uv_coordinates, CARVE_DEPTH
-                    )
-                )
-                active_polygon_vertices.append(bottom_coordinates)
-                active_polygon_uvs.append(node.uv_coordinates)
-                count_idx = node.indices[1]
-                if node.is_edge:
-                    if underside_inner_vertices[count_idx] is None:
-                        underside_inner_vertices[count_idx] = [
-                            top_coordinates,
-                            bottom_coordinates,
-                        ]
-
-            # walls
-            inactive_neighbor_lines = polygon.get_inactive_neighbor_lines()
-            for inactive_line_nodes in inactive_neighbor_lines:
-                terrain_coordinates = [
-                    self.coordinate_system.uv_coordinates_to_face_coordinates(
-                        node.uv_coordinates
-                    )
-                    for node in inactive_line_nodes
-                ]
-                carve_coordinates = [
-                    self.coordinate_system.sink_vector(coordinates, CARVE_DEPTH)
-                    for coordinates in terrain_coordinates
-                ]
-                quad_triangles = [
-                    terrain_coordinates[0],
-                    terrain_coordinates[1],
-                    carve_coordinates[0],
-                    carve_coordinates[1],
-                    carve_coordinates[0],
-                    terrain_coordinates[1],
-                ]
-                wall_vertices.extend([v for v in quad_triangles])
-
-        # Underside
+        edge_count_indices = self.puzzle_face.carve_edge_count_indices()
+        edge_vertex_positions = np.nonzero(edge_count_indices >= 0)[0]
+        (edge_count_indices, first_positions) = np.unique(
+            edge_count_indices[edge_vertex_positions], return_index=True
+        )
+        for count_idx, position in zip(
+            edge_count_indices.tolist(), edge_vertex_positions[first_positions].tolist()
+        ):
+            underside_inner_vertices[count_idx] = [
+                top_vertices[position],
+                active_polygon_vertices[position],
+            ]
+
+        # walls
+        line_uvs = self.puzzle_face.wall_uv_lines()
+        terrain_coordinates = coordinate_system.uv_array_to_face_coordinates(
+            line_uvs
+        ).reshape(-1, 2, 3)
+        carve_coordinates = coordinate_system.sink_vector(terrain_coordinates, CARVE_DEPTH)
+        wall_vertices = np.stack(
+            [
+                terrain_coordinates[:, 0],
+                terrain_coordinates[:, 1],
+                carve_coordinates[:, 0],
+                carve_coordinates[:, 1],
+                carve_coordinates[:, 0],
+                terrain_coordinates[:, 1],
+            ],
+            axis=1,
+        ).reshape(-1, 3)
+
+        return (active_polygon_vertices, wall_vertices, active_polygon_uvs, underside_inner_vertices)
+
+    def __make_underside_vertices(self, underside_inner_vertices):
         underside_vertices = [np.array([0, 0, 0])]
         for ix, vertex in enumerate(self.face_vertices):
             underside_vertices.append(vertex)
@@ -280,18 +301,61 @@ class Face(Renderable):
                 underside_vertices.extend(underside_wall_vertices)
                 top_first = not top_first
         underside_vertices.append(self.face_vertices[0])
-        underside_vertices = np.array(underside_vertices) * UNDERSIDE_NUDGE
+        return np.array(underside_vertices) * UNDERSIDE_NUDGE
+
+    def __make_buffers(self, ctx, terrain_shader, carve_shader, wall_shader, underside_shader):
+        self.terrain_shader_ref = terrain_shader
+        (self.terrain_buffer, self.terrain_index_buffer) = self.__make_indexed_vbo(
+            ctx, self.terrain_mesh
+        )
+        self.terrain_vertex_array = self.__make_vao(
+            ctx,
+            self.terrain_shader_ref,
+            [(self.terrain_buffer, "2f 3f", "in_textcoord_0", "in_position")],
+            self.terrain_index_buffer,
+        )
 
-        return (active_polygon_vertices, wall_vertices, underside_vertices, active_polygon_uvs)
+        if self.has_carvings:
+            self.carve_shader_ref = carve_shader
+            (self.carve_buffer, self.carve_index_buffer) = self.__make_indexed_vbo(
+                ctx, self.carve_mesh
+            )
+            self.carve_vertex_array = self.__make_vao(
+                ctx,
+                self.carve_shader_ref,
+                [(self.carve_buffer, "2f 3f", "in_textcoord_0", "in_position")],
+                self.carve_index_buffer,
+            )
 
-    def __make_vao(self, ctx, shader, context):
-        return ctx.vertex_array(shader, context)
+            self.wall_shader_ref = wall_shader
+            (self.wall_buffer, self.wall_index_buffer) = self.__make_indexed_vbo(
+                ctx, self.wall_mesh
+            )
+            self.wall_vertex_array = self.__make_vao(
+                ctx,
+                self.wall_shader_ref,
+                [(self.wall_buffer, "3f", "in_position")],
+                self.wall_index_buffer,
+            )
+
+        self.underside_shader_ref = underside_shader
+        self.underside_buffer = self.__make_vbo(ctx, self.underside_mesh)
+        self.underside_vertex_array = self.__make_vao(
+            ctx, self.underside_shader_ref, [(self.underside_buffer, "3f", "in_position")]
+        )
+
+    def __make_vao(self, ctx, shader, context, index_buffer=None):
+        return ctx.vertex_array(
+            shader, context, index_buffer=index_buffer, index_element_size=4
+        )
 
     def __make_vbo(self, ctx, vertices):
         return ctx.buffer(np.array(vertices, dtype="f4"))
 
-    def __make_vbo_with_uv(self, ctx, vertices, uvs):
-        return self.__make_vbo(ctx, merge_collection_items(uvs, vertices))
+    def __make_indexed_vbo(self, ctx, vertices):
+        # Polygons share lattice nodes, so store each vertex once and index it
+        (unique_vertices, indices) = index_vertices(vertices)
+        return (ctx.buffer(unique_vertices), ctx.buffer(indices))
 
     def __rotate_by_rotations(self, rotations):
         rotation_angle = self.coordinate_system.rotation_angle * rotations
@@ -310,32 +374,42 @@ class Face(Renderable):
         self.puzzle_face.rotate(rotations % len(self.coordinate_system.segment_vectors))
         emit_event(FACE_ROTATED, {})
 
-    def renderFace(self, camera: Camera, model_matrix, delta_time):
-        if self.rotation_animator.is_animating:
-            rotations = self.rotation_animator.frame(delta_time)
-            self.__rotate_by_rotations(rotations)
+    def update(self, delta_time):
+        # The animators move the face through their callbacks. Faces in an
+        # AnimationSystem are advanced along with the rest of it.
+        if self.rotation_animator.system is None:
+            self.rotation_animator.frame(delta_time)
+            self.pull_animator.frame(delta_time)
 
-        if self.pull_animator.is_animating:
-            pull_distance = self.pull_animator.frame(delta_time)
-            self.__pull_by_distance(pull_distance)
+    @property
+    def face_matrix(self):
+        return self.rot_matrix * self.pull_matrix
 
+    def renderFace(self, camera: Camera, model_matrix, delta_time):
+        self.update(delta_time)
 
-        m_mvp = camera.view_projection_matrix * model_matrix * self.rot_matrix * self.pull_matrix
-        self.terrain_shader_ref["m_mvp"].write(m_mvp)
-        self.terrain_shader_ref["v_nv"].write(self.nv)
-        self.terrain_vertex_array.render()
+        m_mvp = camera.view_projection_matrix * model_matrix * self.face_matrix
+        with gpu_profiler.section("terrain"):
+            self.terrain_shader_ref["m_mvp"].write(m_mvp)
+            self.terrain_shader_ref["v_nv"].write(self.nv)
+            self.terrain_vertex_array.render()
 
         if self.is_puzzle_solved:
             return # don't render path when exploding
 
         if self.has_carvings:
-            self.carve_shader_ref["m_mvp"].write(m_mvp)
-            self.carve_vertex_array.render()
-            self.wall_shader_ref["m_mvp"].write(m_mvp)
-            self.wall_vertex_array.render()
-
-        self.underside_shader_ref["m_mvp"].write(m_mvp)
-        self.underside_vertex_array.render(mode=moderngl.TRIANGLE_FAN)
+            with gpu_profiler.section("carve"):
+                self.carve_shader_ref["m_mvp"].write(m_mvp)
+                self.carve_vertex_array.render()
+            with gpu_profiler.section("wall"):
+                self.wall_shader_ref["m_mvp"].write(m_mvp)
+                self.wall_shader_ref["v_color"].write(self.wall_color)
+                self.wall_vertex_array.render()
+
+        with gpu_profiler.section("underside"):
+            self.underside_shader_ref["m_mvp"].write(m_mvp)
+            self.underside_shader_ref["v_color"].write(self.underside_color)
+            self.underside_vertex_array.render(mode=moderngl.TRIANGLE_FAN)
 
         # self.rotation_animator.frame(delta_time)
 
@@ -365,12 +439,21 @@ class Face(Renderable):
         self.is_puzzle_solved = False
 
     def destroy(self):
+        if self.is_batched:
+            return
         self.terrain_buffer.release()
+        self.terrain_index_buffer.release()
         self.terrain_vertex_array.release()
-
-    def projected_vertices(self, matrix) -> list[glm.vec4]:
-        # This returns a vec4 in clip space
-        return [
-            matrix * self.rot_matrix * glm.vec4(vertex, 1.0)
-            for vertex in self.face_vertices
-        ]
+        if self.has_carvings:
+            self.carve_buffer.release()
+            self.carve_index_buffer.release()
+            self.carve_vertex_array.release()
+            self.wall_buffer.release()
+            self.wall_index_buffer.release()
+            self.wall_vertex_array.release()
+        self.underside_buffer.release()
+        self.underside_vertex_array.release()
+
+    def projected_vertices(self, matrix) -> np.ndarray:
+        # This returns (V, 4) coordinates in clip space
+        return self.corner_vertices @ np.array(matrix * self.rot_matrix).T
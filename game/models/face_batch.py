@@ -0,0 +1,154 @@
+import glm
+import moderngl
+import numpy as np
+
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
+from models.face import Face
+from models.helpers import index_vertices
+
+# Sizes of the FaceTransforms uniform block in the batched_* shaders
+MAX_BATCHED_FACES = 20
+MAT4_SIZE = 64
+VEC4_SIZE = 16
+FACE_NORMALS_OFFSET = MAX_BATCHED_FACES * MAT4_SIZE
+
+FACE_TRANSFORMS_BINDING = 0
+
+
+class FaceBatch:
+    """
+    Draws all the faces of a polyhedron with a single draw call per pass.
+
+    Every pass packs the meshes of all faces into one buffer, tagging each
+    vertex with the index of its face. The faces' rotation and pull matrices
+    are written to a uniform block once a frame and looked up by that index
+    in the batched_* shaders.
+    """
+
+    @tracer.traced("upload face batch", category="upload")
+    def __init__(
+        self,
+        ctx: moderngl.Context,
+        faces: list[Face],
+        terrain_shader: moderngl.Program,
+        carve_shader: moderngl.Program,
+        wall_shader: moderngl.Program,
+        underside_shader: moderngl.Program,
+        wall_color: glm.vec4,
+        underside_color: glm.vec4,
+    ):
+        if len(faces) > MAX_BATCHED_FACES:
+            raise ValueError(f"Can't batch more than {MAX_BATCHED_FACES} faces")
+
+        self.faces = faces
+        self.shaders = [terrain_shader, carve_shader, wall_shader, underside_shader]
+        self.wall_shader = wall_shader
+        self.wall_color = wall_color
+        self.underside_shader = underside_shader
+        self.underside_color = underside_color
+
+        self.face_transforms = ctx.buffer(reserve=FACE_NORMALS_OFFSET + MAX_BATCHED_FACES * VEC4_SIZE)
+        face_normals = np.zeros((len(faces), 4), dtype="f4")
+        for (face_idx, face) in enumerate(faces):
+            face_normals[face_idx, :3] = face.coordinate_system.normal_vector
+        self.face_transforms.write(face_normals, offset=FACE_NORMALS_OFFSET)
+        for shader in self.shaders:
+            shader["FaceTransforms"].binding = FACE_TRANSFORMS_BINDING
+
+        self.gl_objects = []
+        self.terrain_vertex_array = self.__make_pass(
+            ctx,
+            terrain_shader,
+            [face.terrain_mesh for face in faces],
+            ["2f 3f 1f", "in_textcoord_0", "in_position", "in_face"],
+        )
+        self.carve_vertex_array = self.__make_pass(
+            ctx,
+            carve_shader,
+            [face.carve_mesh if face.has_carvings else None for face in faces],
+            ["2f 3f 1f", "in_textcoord_0", "in_position", "in_face"],
+        )
+        self.wall_vertex_array = self.__make_pass(
+            ctx,
+            wall_shader,
+            [face.wall_mesh if face.has_carvings else None for face in faces],
+            ["3f 1f", "in_position", "in_face"],
+        )
+        self.underside_vertex_array = self.__make_underside_pass(ctx, underside_shader)
+
+    def __make_vao(self, ctx, shader, vertices, indices, content):
+        buffer = ctx.buffer(vertices)
+        index_buffer = ctx.buffer(indices)
+        vertex_array = ctx.vertex_array(
+            shader,
+            [(buffer, *content)],
+            index_buffer=index_buffer,
+            index_element_size=4,
+        )
+        self.gl_objects.extend([buffer, index_buffer, vertex_array])
+        return vertex_array
+
+    def __make_pass(self, ctx, shader, meshes, content):
+        tagged_meshes = [
+            np.hstack([mesh, np.full((len(mesh), 1), face_idx, dtype="f4")])
+            for (face_idx, mesh) in enumerate(meshes)
+            if mesh is not None and len(mesh) > 0
+        ]
+        if len(tagged_meshes) == 0:
+            return None
+        (vertices, indices) = index_vertices(np.concatenate(tagged_meshes))
+        return self.__make_vao(ctx, shader, vertices, indices, content)
+
+    def __make_underside_pass(self, ctx, shader):
+        # Undersides are triangle fans, so spell each fan out as a triangle list
+        tagged_meshes = []
+        fan_indices = []
+        vertex_offset = 0
+        for (face_idx, face) in enumerate(self.faces):
+            mesh = face.underside_mesh
+            tagged_meshes.append(
+                np.hstack([mesh, np.full((len(mesh), 1), face_idx, dtype="f4")])
+            )
+            spokes = np.arange(1, len(mesh) - 1, dtype="u4")
+            fan_indices.append(
+                np.stack([np.zeros_like(spokes), spokes, spokes + 1], axis=1) + vertex_offset
+            )
+            vertex_offset += len(mesh)
+        return self.__make_vao(
+            ctx,
+            shader,
+            np.concatenate(tagged_meshes),
+            np.concatenate(fan_indices).astype("u4"),
+            ["3f 1f", "in_position", "in_face"],
+        )
+
+    def render(self, m_mvp, delta_time):
+        for face in self.faces:
+            face.update(delta_time)
+        self.face_transforms.write(b"".join(face.face_matrix.to_bytes() for face in self.faces))
+        self.face_transforms.bind_to_uniform_block(FACE_TRANSFORMS_BINDING)
+
+        for shader in self.shaders:
+            shader["m_mvp"].write(m_mvp)
+        with gpu_profiler.section("terrain"):
+            self.terrain_vertex_array.render()
+
+        if any(face.is_puzzle_solved for face in self.faces):
+            return # don't render path when exploding
+
+        if self.carve_vertex_array is not None:
+            with gpu_profiler.section("carve"):
+                self.carve_vertex_array.render()
+        if self.wall_vertex_array is not None:
+            with gpu_profiler.section("wall"):
+                self.wall_shader["v_color"].write(self.wall_color)
+                self.wall_vertex_array.render()
+        with gpu_profiler.section("underside"):
+            self.underside_shader["v_color"].write(self.underside_color)
+            self.underside_vertex_array.render()
+
+    def destroy(self):
+        self.face_transforms.release()
+        for gl_object in self.gl_objects:
+            gl_object.release()
@@ -0,0 +1,91 @@
+import glm
+import moderngl
+import numpy as np
+
+from constants.dimensions import SCREEN_DIMENSIONS
+from engine.shader import get_shader_program, release_shader_program
+from models.face import Face
+
+# Screen pixels per picking pixel along each axis
+PICKING_SCALE = 4
+# Length of the m_faces array in the face_id shader
+MAX_PICKED_FACES = 20
+MAT4_SIZE = 64
+
+
+class FacePicker:
+    """
+    Finds the face under the mouse by drawing face indices into a small
+    integer framebuffer and reading back a single pixel. The framebuffer is
+    only redrawn when the polyhedron or one of its faces has turned since
+    the last pick.
+    """
+
+    def __init__(self, ctx: moderngl.Context, faces: list[Face]):
+        if len(faces) > MAX_PICKED_FACES:
+            raise ValueError(f"Can't pick between more than {MAX_PICKED_FACES} faces")
+
+        self.ctx = ctx
+        self.faces = faces
+        self.shader = get_shader_program(ctx, "face_id")
+
+        size = (SCREEN_DIMENSIONS[0] // PICKING_SCALE, SCREEN_DIMENSIONS[1] // PICKING_SCALE)
+        self.face_id_texture = ctx.texture(size, 1, dtype="i4")
+        self.depth_buffer = ctx.depth_renderbuffer(size)
+        self.framebuffer = ctx.framebuffer([self.face_id_texture], self.depth_buffer)
+
+        # Every face outline as a fan of triangles tagged with its face index
+        vertices = []
+        indices = []
+        for (face_idx, face) in enumerate(faces):
+            vertex_offset = len(vertices)
+            vertices.extend((*vertex, face_idx) for vertex in face.face_vertices)
+            for ix in range(1, len(face.face_vertices) - 1):
+                indices.append((vertex_offset, vertex_offset + ix, vertex_offset + ix + 1))
+        self.buffer = ctx.buffer(np.array(vertices, dtype="f4"))
+        self.index_buffer = ctx.buffer(np.array(indices, dtype="u4"))
+        self.vertex_array = ctx.vertex_array(
+            self.shader,
+            [(self.buffer, "3f 1f", "in_position", "in_face")],
+            index_buffer=self.index_buffer,
+            index_element_size=4,
+        )
+
+        self.drawn_state = None
+
+    def __draw(self, m_mvp: glm.mat4, face_matrices: bytes):
+        previous_framebuffer = self.ctx.fbo
+        self.framebuffer.use()
+        self.framebuffer.clear(depth=1.0)
+        self.shader["m_mvp"].write(m_mvp)
+        self.shader["m_faces"].write(face_matrices)
+        self.vertex_array.render()
+        previous_framebuffer.use()
+
+    def pick(self, mouse_pos: tuple[int, int], m_mvp: glm.mat4):
+        """
+        @returns: the index of the face under mouse_pos, or None
+        """
+        face_matrices = b"".join(
+            face.rot_matrix.to_bytes() for face in self.faces
+        ).ljust(MAX_PICKED_FACES * MAT4_SIZE, b"\0")
+        state = m_mvp.to_bytes() + face_matrices
+        if state != self.drawn_state:
+            self.__draw(m_mvp, face_matrices)
+            self.drawn_state = state
+
+        (width, height) = self.framebuffer.size
+        x = min(max(int(mouse_pos[0]) // PICKING_SCALE, 0), width - 1)
+        y = min(max(height - 1 - int(mouse_pos[1]) // PICKING_SCALE, 0), height - 1)
+        pixel = self.framebuffer.read(viewport=(x, y, 1, 1), components=1, dtype="i4")
+        face_id = int.from_bytes(pixel, "little", signed=True)
+        return face_id - 1 if face_id > 0 else None
+
+    def destroy(self):
+        self.vertex_array.release()
+        self.buffer.release()
+        self.index_buffer.release()
+        self.framebuffer.release()
+        self.face_id_texture.release()
+        self.depth_buffer.release()
+        release_shader_program(self.shader)
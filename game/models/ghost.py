@@ -5,7 +5,7 @@ import pygame
 import numpy as np
 
 from engine.camera import Camera
-from engine.shader import get_shader_program
+from engine.shader import get_shader_program, release_shader_program
 from engine.renderable import Renderable
 from engine.arcball import ArcBall
 
@@ -17,7 +17,6 @@ class Ghost:
         self.ctx = ctx
 
         self.shader = get_shader_program(ctx, "uniform_color")
-        self.shader["v_color"] = glm.vec4(1.0, 0.0, 0.0, 1.0)
 
         vertex_data = np.array(face_vertices, dtype="f4")
         self.vbo = self.ctx.buffer(vertex_data)
@@ -25,14 +24,13 @@ class Ghost:
         self.matrix = glm.mat4()
         self.arcball = ArcBall(self.__update_model_matrix)
 
-    def __update_model_matrix(self, new_transform):
-        for x in range(4):
-            for y in range(4):
-                self.matrix[x][y] = new_transform[x][y]
+    def __update_model_matrix(self, new_transform: glm.mat4):
+        self.matrix = new_transform
 
     def render(self, camera):
         m_mvp = camera.view_projection_matrix * self.matrix
         self.shader["m_mvp"].write(m_mvp)
+        self.shader["v_color"] = glm.vec4(1.0, 0.0, 0.0, 1.0)
         self.vao.render()
 
     def handle_events(self, delta_time: int):
@@ -40,7 +38,7 @@ class Ghost:
             self.arcball.handle_event(evt)
 
     def destroy(self):
-        self.shader.release()
+        release_shader_program(self.shader)
         if self.vao:
             self.vao.release()
         if self.vbo:
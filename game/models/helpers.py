@@ -24,12 +24,29 @@ def face_vertices_from_indices(
     return face_vertices
 
 def merge_collection_items(a: list, b: list):
+    """
+    Interleave two collections of vertex attributes row by row into a single
+    f4 array, ready to be handed to ctx.buffer
+    """
     alen = len(a)
     if alen != len(b):
         raise Exception('length of both collections must be equal')
-    i = 0
-    c = []
-    while i < alen:
-        c.append([*a[i], *b[i]])
-        i += 1
-    return c
\ No newline at end of file
+    return np.hstack([
+        np.asarray(a, dtype="f4").reshape(alen, -1),
+        np.asarray(b, dtype="f4").reshape(alen, -1),
+    ])
+
+def index_vertices(vertices: np.ndarray):
+    """
+    Collapse identical rows of an interleaved vertex array.
+    @returns: (unique f4 vertices, u4 indices rebuilding the original rows)
+    """
+    vertices = np.ascontiguousarray(vertices, dtype="f4")
+    vertices = vertices.reshape(len(vertices), -1)
+    # Comparing whole rows as raw bytes is much quicker than np.unique(axis=0)
+    rows = vertices.view(np.dtype((np.void, vertices.itemsize * vertices.shape[1])))
+    (unique_rows, indices) = np.unique(rows.reshape(-1), return_inverse=True)
+    return (
+        unique_rows.view("f4").reshape(-1, vertices.shape[1]),
+        indices.reshape(-1).astype("u4"),
+    )
@@ -8,7 +8,7 @@ from engine.camera import Camera
 from puzzles.puzzle_graph import PuzzleGraph
 from models.polyhedron import Polyhedron
 from scenes.gameplay_levels import LEVELS
-from engine.animation import AnimationLerper, AnimationLerpFunction, Animator
+from engine.animation import AnimationLerper, AnimationLerpFunction, LoopingAnimation
 from models.star import Star
 
 ORIGIN = glm.vec3(0.0, 0.0, 0.0)
@@ -30,35 +30,35 @@ class Planet:
 
         runtime = (2 * math.pi * radius / speed) * 1000
 
-        self.revolve_animator = Animator(
-            lerper=AnimationLerper(AnimationLerpFunction.linear, runtime),
-            start_value=0.0,
-            infinite=True,
+        self.revolve_animation = LoopingAnimation(
+            AnimationLerper(AnimationLerpFunction.linear, runtime),
+            0.0,
+            2.0 * math.pi,
         )
 
-        self.rotate_animator = Animator(
-            lerper=AnimationLerper(AnimationLerpFunction.linear, random.randint(5, 10)*1000),
-            start_value=0.0,
-            infinite=True,
+        self.rotate_animation = LoopingAnimation(
+            AnimationLerper(AnimationLerpFunction.linear, random.randint(5, 10)*1000),
+            0.0,
+            2.0 * math.pi,
         )
 
 
     def start(self):
-        self.revolve_animator.start(2.0 * math.pi)
-        self.rotate_animator.start(2.0 * math.pi)
+        self.revolve_animation.start()
+        self.rotate_animation.start()
         self.obj.set_is_resonant(True)
 
-    def _translation_matrix(self, delta_time):
-        angle = self.angle_offset + self.revolve_animator.frame(delta_time)
+    def _translation_matrix(self):
+        angle = self.angle_offset + self.revolve_animation.value()
         t = glm.vec3(self.radius * math.cos(angle), self.radius * math.sin(angle), 0)
         return glm.translate(t)
     
-    def _rotatation_matrix(self, delta_time):
-        angle = self.rotate_animator.frame(delta_time)
+    def _rotatation_matrix(self):
+        angle = self.rotate_animation.value()
         return glm.rotate(angle, glm.vec3(0, 0, 1))
     
-    def transform_matrix(self, delta_time):
-        return self._translation_matrix(delta_time) * self._rotatation_matrix(delta_time)
+    def transform_matrix(self):
+        return self._translation_matrix() * self._rotatation_matrix()
 
 
 class SolarSystem:
@@ -99,8 +99,12 @@ class SolarSystem:
         for p in self.planets:
             p.start()
 
+    def update(self, delta_time: float):
+        for p in self.planets:
+            p.obj.update(delta_time)
+
     def render(self, delta_time: int):
         self.star.render(delta_time)
         for p in self.planets:
-            p.obj.m_model = self.scale_matrix * p.transform_matrix(delta_time)
+            p.obj.m_model = self.scale_matrix * p.transform_matrix()
             p.obj.render(delta_time)
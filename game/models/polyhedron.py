@@ -1,3 +1,4 @@
+import os
 import moderngl
 import glm
 import pygame
@@ -6,20 +7,24 @@ import numpy as np
 from constants.colors import BlendModes, Colors, ShapeStyle
 
 from engine.camera import Camera
+from engine.clock import world_clock
 from engine.texture import get_texture, texture_maps
-from engine.animation import AnimationLerper, AnimationLerpFunction, Animator
+from engine.animation import AnimationLerper, AnimationLerpFunction, Animator, AnimationSystem, animation_activity
 from engine.audio.sound_effect import SoundEffect
 from puzzles.puzzle_graph import PuzzleGraph
 from engine.renderable import Renderable
-from engine.shader import get_shader_program
+from engine.shader import get_shader_program, release_shader_program
 from models.types import Vertex
 from models.face import Face
+from models.face_batch import FaceBatch
+from models.face_picker import FacePicker
 from engine.arcball import ArcBall
+from engine.trace import tracer
 from engine.events import (
     FACE_ACTIVATED, FACE_ROTATED, ARCBALL_DONE,
     PUZZLE_SOLVED, NEXT_PUZZLE, NEXT_LEVEL, PUZZLE_EXITED,
     emit_event)
-from engine.events.mouse import find_mouse_face, ClickDetector
+from engine.events.mouse import ScreenFaces, ClickDetector
 
 
 MOVEMENT_DEG_PER_DELTA = 0.005
@@ -42,8 +47,15 @@ LINE_LUMINOSITY_ACTIVE = 1.0
 INTRODUCTION_ROTATION = -np.deg2rad(360) * 2
 INTRODUCTION_Z = 30
 
+AMBIENT_LIGHT = glm.vec3(0.2, 0.2, 0.2)
+
 
 class Polyhedron(Renderable):
+    EVENT_TYPES = (
+        pygame.MOUSEMOTION, ARCBALL_DONE, FACE_ACTIVATED, FACE_ROTATED,
+        *ClickDetector.EVENT_TYPES, *ArcBall.EVENT_TYPES,
+    )
+
     def __init__(
         self,
         ctx: moderngl.Context,
@@ -58,33 +70,38 @@ class Polyhedron(Renderable):
         self.camera = camera
 
         self.time = 0.0
+        self.previous_time = 0.0
 
-        (texture, texture_location) = get_texture(ctx, style.texture_name)
+        (texture, self.texture_location) = get_texture(ctx, style.texture_name)
 
         self.style = style
+        self.is_exploding = False
+        self.lumin = LINE_LUMINOSITY_INACTIVE
 
-        self.terrain_shader = get_shader_program(ctx, "exploding_image")
-        self.terrain_shader["u_texture_0"] = texture_location
-        self.terrain_shader["time"] = self.time
-        self.terrain_shader["run_time"] = EXPLOSION_RUNTIME
-        self.terrain_shader["explode"] = False
-        self.terrain_shader["v_light"].write(-camera.position)
-        self.terrain_shader["v_ambient"].write(glm.vec3(0.2,0.2,0.2))
-
-        self.carve_shader = get_shader_program(ctx, "blend_color_image")
-        self.carve_shader["u_texture_0"] = texture_location
-        self.carve_shader["v_color"].write(style.path_color)
-        self.carve_shader["blend_mode"] = style.blend_mode
-        self.carve_shader["lumin"] = LINE_LUMINOSITY_INACTIVE
-
-        self.wall_shader = get_shader_program(ctx, "uniform_color")
-        self.wall_shader["v_color"] = style.wall_color
+        # BATCH_FACES=1 draws each pass for all faces at once through a FaceBatch
+        is_batched = os.environ.get("BATCH_FACES", None) == "1"
+        shader_prefix = "batched_" if is_batched else ""
 
-        self.underside_shader = get_shader_program(ctx, "uniform_color")
-        self.underside_shader["v_color"] = style.underside_color
+        # These programs are shared with every other polyhedron, so their
+        # uniforms are written in __write_uniforms before each render
+        self.terrain_shader = get_shader_program(
+            ctx, f"{shader_prefix}exploding_image", "exploding_image"
+        )
+        self.carve_shader = get_shader_program(
+            ctx, f"{shader_prefix}blend_color_image", "blend_color_image"
+        )
+        self.wall_shader = get_shader_program(
+            ctx, f"{shader_prefix}uniform_color", "uniform_color"
+        )
+        self.underside_shader = get_shader_program(
+            ctx, f"{shader_prefix}uniform_color", "uniform_color"
+        )
 
         self.click_detector = ClickDetector(on_click=self.handle_click)
 
+        # Ticks the animators of the polyhedron and all its faces at once
+        self.animation_system = AnimationSystem()
+
         self.faces = []
         puzzle_faces = puzzle.faces
         for pf in puzzle_faces:
@@ -94,9 +111,36 @@ class Polyhedron(Renderable):
                 carve_shader=self.carve_shader,
                 wall_shader=self.wall_shader,
                 underside_shader=self.underside_shader,
+                wall_color=style.wall_color,
+                underside_color=style.underside_color,
+                is_batched=is_batched,
+                animation_system=self.animation_system,
             )
             self.faces.append(face)
 
+        self.face_batch = None
+        if is_batched:
+            self.face_batch = FaceBatch(ctx, self.faces,
+                terrain_shader=self.terrain_shader,
+                carve_shader=self.carve_shader,
+                wall_shader=self.wall_shader,
+                underside_shader=self.underside_shader,
+                wall_color=style.wall_color,
+                underside_color=style.underside_color,
+            )
+
+        # GPU_PICKING=1 finds the hovered face with a FacePicker instead of
+        # testing every projected face on the CPU
+        self.face_picker = None
+        if os.environ.get("GPU_PICKING", None) == "1":
+            self.face_picker = FacePicker(ctx, self.faces)
+
+        self.face_corner_vertices = np.array(
+            [face.corner_vertices for face in self.faces]
+        )
+        self.projection_key = None
+        self.projected_screen_faces = None
+
         self.m_model = glm.mat4()
 
         self.arcball = ArcBall(self.__update_model_matrix, emit_events=kwargs.get("emit_arcball_events", False))
@@ -120,6 +164,7 @@ class Polyhedron(Renderable):
             start_value=LINE_LUMINOSITY_INACTIVE,
             on_frame=self.__animate_resonance,
             on_stop=self.__animate_resonance,
+            system=self.animation_system,
         )
 
         self.introduction_animator = Animator(
@@ -128,17 +173,25 @@ class Polyhedron(Renderable):
                 INTRODUCTION_RUNTIME,
             ),
             start_value=1.0,
+            on_frame=self.__animate_introduction,
+            on_stop=self.__animate_introduction,
+            system=self.animation_system,
         )
 
         self.enter_scene_animator = Animator(
             lerper=AnimationLerper(AnimationLerpFunction.ease_out, ENTER_SCENE_RUNTIME),
-            start_value=ENTER_SCENE_STARTING_POS
+            start_value=ENTER_SCENE_STARTING_POS,
+            on_frame=self.__animate_enter_scene,
+            on_stop=self.__animate_enter_scene,
+            system=self.animation_system,
         )
 
         self.exit_scene_animator = Animator(
             lerper=AnimationLerper(AnimationLerpFunction.ease_in, EXIT_SCENE_RUNTIME),
             start_value=EXIT_SCENE_STARTING_POS,
-            on_stop=self._on_exit
+            on_frame=self.__animate_exit_scene,
+            on_stop=self._on_exit,
+            system=self.animation_system,
         )
         self.exit_scene_dx = 0
 
@@ -157,9 +210,24 @@ class Polyhedron(Renderable):
         self.last_model = glm.mat4(self.m_model)
         self.exit_scene_animator.start(EXIT_SCENE_TARGET_POS)
 
-    def _on_exit(self, _value):
+    def _on_exit(self, x):
+        self.__animate_exit_scene(x)
         emit_event(PUZZLE_EXITED)
 
+    def __animate_introduction(self, introduction_progress: float):
+        self.m_model = glm.translate(
+            glm.vec3(0.0, 0.0,INTRODUCTION_Z * introduction_progress)
+        ) * glm.rotate(
+            INTRODUCTION_ROTATION * introduction_progress,
+            (0.0, 1.0, 0.0)
+        )
+
+    def __animate_enter_scene(self, px: float):
+        self.m_model = glm.translate(glm.vec3(px, 0, 0))
+
+    def __animate_exit_scene(self, x: float):
+        self.m_model = glm.translate(glm.vec3(x, 0, -x)) * self.last_model
+
     def reset(self):
         self.is_puzzle_solved = False
         self.is_alive = False
@@ -170,14 +238,29 @@ class Polyhedron(Renderable):
         for face in self.faces:
             face.reset()
 
-    def __update_model_matrix(self, new_transform):
-        for x in range(4):
-            for y in range(4):
-                self.m_model[x][y] = new_transform[x][y]
+    def __update_model_matrix(self, new_transform: glm.mat4):
+        self.m_model = new_transform
 
-    def projected_face_vertices(self) -> list[list[glm.vec4]]:
+    def projected_face_vertices(self) -> np.ndarray:
+        # (F, V, 4) clip coordinates of every face corner
         m_mvp = self.camera.view_projection_matrix * self.m_model
-        return [face.projected_vertices(m_mvp) for face in self.faces]
+        face_matrices = np.array([
+            np.array(m_mvp * face.rot_matrix) for face in self.faces
+        ])
+        return np.einsum("fij,fvj->fvi", face_matrices, self.face_corner_vertices)
+
+    def screen_faces(self) -> ScreenFaces:
+        """
+        The faces' outlines on screen, projected again only once the
+        polyhedron or one of its faces has turned
+        """
+        projection_key = (self.camera.view_projection_matrix * self.m_model).to_bytes() + b"".join(
+            face.rot_matrix.to_bytes() for face in self.faces
+        )
+        if projection_key != self.projection_key:
+            self.projected_screen_faces = ScreenFaces(self.projected_face_vertices())
+            self.projection_key = projection_key
+        return self.projected_screen_faces
 
     def scramble(self, face_rotations=None):
         if face_rotations is not None:
@@ -201,9 +284,12 @@ class Polyhedron(Renderable):
         if self.is_puzzle_solved or self.arcball.is_dragging:
             return
 
-        hovered_face_idx = find_mouse_face(
-            mouse_pos, self.projected_face_vertices()
-        )
+        if self.face_picker is not None:
+            hovered_face_idx = self.face_picker.pick(
+                mouse_pos, self.camera.view_projection_matrix * self.m_model
+            )
+        else:
+            hovered_face_idx = self.screen_faces().find_face(mouse_pos)
         if hovered_face_idx != self.hovered_face_idx:
             if self.hovered_face_idx is not None:
                 self.faces[self.hovered_face_idx].push()
@@ -220,7 +306,7 @@ class Polyhedron(Renderable):
         )
 
     def __animate_resonance(self, new_value: float):
-        self.carve_shader["lumin"] = new_value
+        self.lumin = new_value
 
     def explode(self):
         for face in self.faces:
@@ -229,25 +315,45 @@ class Polyhedron(Renderable):
 
     def __start_exploding(self):
         self.time = 0.0
-        self.terrain_shader["explode"] = True
-        self.terrain_shader["time"] = 0.0
-        pygame.time.set_timer(NEXT_LEVEL, EXPLOSION_RUNTIME, loops=1)
+        self.previous_time = 0.0
+        self.is_exploding = True
 
-    def __render_exploding(self, delta_time):
+    def __update_exploding(self, delta_time):
+        self.previous_time = self.time
         self.time += delta_time
-        self.terrain_shader["time"] = self.time / 1000.0
+        # Timed on the simulation, so the explosion plays out in full
+        # however fast frames are drawn
+        if self.is_exploding and self.previous_time < EXPLOSION_RUNTIME <= self.time:
+            emit_event(NEXT_LEVEL)
 
     def __stop_exploding(self):
-        self.terrain_shader["explode"] = False
+        self.is_exploding = False
+
+    def __write_uniforms(self):
+        self.terrain_shader["u_texture_0"] = self.texture_location
+        time = self.previous_time + (self.time - self.previous_time) * world_clock.alpha
+        self.terrain_shader["time"] = time / 1000.0
+        self.terrain_shader["run_time"] = EXPLOSION_RUNTIME
+        self.terrain_shader["explode"] = self.is_exploding
+        self.terrain_shader["v_light"].write(-self.camera.position)
+        self.terrain_shader["v_ambient"].write(AMBIENT_LIGHT)
+        self.terrain_shader['m_model'].write(self.m_model)
+
+        self.carve_shader["u_texture_0"] = self.texture_location
+        self.carve_shader['v_color'].write(self.style.path_color)
+        self.carve_shader["blend_mode"] = self.style.blend_mode
+        self.carve_shader["lumin"] = self.lumin
 
     def handle_event(self, event: pygame.event.Event, world_time: int):
         if not self.is_alive:
             return
-        if event.type == pygame.MOUSEMOTION or event.type == ARCBALL_DONE:
-            self.handle_move(pygame.mouse.get_pos())
+        if event.type == pygame.MOUSEMOTION:
+            self.handle_move(event.pos)
+        elif event.type == ARCBALL_DONE:
+            self.handle_move(event.mouse_pos)
         elif event.type == FACE_ACTIVATED:
-            face_index = event.__dict__["face_index"]
-            mouse_button = event.__dict__["mouse_button"]
+            face_index = event.face_index
+            mouse_button = event.mouse_button
             self.is_face_rotating = True
             if mouse_button == pygame.BUTTON_LEFT:
                 self.faces[face_index].rotate(1)
@@ -270,40 +376,42 @@ class Polyhedron(Renderable):
             self.arcball.handle_event(event)
 
 
-    def render(self, delta_time: int):
+    def update(self, delta_time: float):
         if not self.is_alive:
             return
 
-        if self.introduction_animator.is_animating:
-            introduction_progress = self.introduction_animator.frame(delta_time)
-            self.m_model = glm.translate(
-                glm.vec3(0.0, 0.0,INTRODUCTION_Z * introduction_progress)
-            ) * glm.rotate(
-                INTRODUCTION_ROTATION * introduction_progress,
-                (0.0, 1.0, 0.0)
-            )
+        self.animation_system.frame(delta_time)
 
-        if self.enter_scene_animator.is_animating:
-            px = self.enter_scene_animator.frame(delta_time)
-            self.m_model = glm.translate(glm.vec3(px, 0, 0))
+        if self.is_puzzle_solved:
+            self.__update_exploding(delta_time)
 
-        if self.exit_scene_animator.is_animating:
-            x = self.exit_scene_animator.frame(delta_time)
-            self.m_model = glm.translate(glm.vec3(x, 0, -x)) * self.last_model
+    def render(self, delta_time: int):
+        if not self.is_alive:
+            return
+
+        self.animation_system.present()
 
-        self.terrain_shader['m_model'].write(self.m_model)
-        self.carve_shader['v_color'].write(self.style.path_color)
         if self.is_puzzle_solved:
-            self.__render_exploding(delta_time)
-        for face in self.faces:
-            face.renderFace(self.camera, self.m_model, delta_time)
-        self.resonance_animator.frame(delta_time)
+            animation_activity.mark()
+        self.__write_uniforms()
+        if self.face_batch is not None:
+            self.face_batch.render(
+                self.camera.view_projection_matrix * self.m_model, delta_time
+            )
+        else:
+            for face in self.faces:
+                face.renderFace(self.camera, self.m_model, delta_time)
 
+    @tracer.traced("destroy polyhedron", category="unload")
     def destroy(self):
         self.is_alive = False
-        self.terrain_shader.release()
-        self.carve_shader.release()
-        self.wall_shader.release()
-        self.underside_shader.release()
+        release_shader_program(self.terrain_shader)
+        release_shader_program(self.carve_shader)
+        release_shader_program(self.wall_shader)
+        release_shader_program(self.underside_shader)
         for face in self.faces:
             face.destroy()
+        if self.face_batch is not None:
+            self.face_batch.destroy()
+        if self.face_picker is not None:
+            self.face_picker.destroy()
@@ -4,7 +4,8 @@ import numpy as np
 
 from engine.shadeable_object import ShadeableObject
 from models.helpers import triangle_vertices_from_indices
-from engine.animation import AnimationLerper, AnimationLerpFunction, Animator
+from engine.animation import AnimationLerper, AnimationLerpFunction, LoopingAnimation, animation_activity
+from engine.clock import world_clock
 
 vertex_palette = [
     (0.0, 0.0, -1.0),
@@ -145,19 +146,18 @@ class Star(ShadeableObject):
         self.camera = camera
         self.scale_matrix = glm.scale(2 * glm.vec3(scale, scale, scale))
         self.set_uniform("u_resolution", glm.vec2(RESOLUTION, RESOLUTION))
-        self.time = 0.0
 
-        self.rotate_animator = Animator(
-            lerper=AnimationLerper(AnimationLerpFunction.linear, 1500),
-            start_value=0.0,
-            infinite=True,
+        self.rotate_animation = LoopingAnimation(
+            AnimationLerper(AnimationLerpFunction.linear, 1500),
+            0.0,
+            2.0 * pi,
         )
-        self.rotate_animator.start(2.0 * pi)
+        self.rotate_animation.start()
 
     def render(self, delta_time):
-        self.time += delta_time
-        self.shader["u_time"] = self.time * 0.01
-        angle = self.rotate_animator.frame(delta_time)
+        animation_activity.mark()
+        self.shader["u_time"] = world_clock.render_time * 0.01
+        angle = self.rotate_animation.value()
         matrix = self.camera.view_projection_matrix * self.scale_matrix * glm.rotate(angle, glm.vec3(0, 0, 1))
         self.set_uniform("m_mvp", matrix)
 
@@ -0,0 +1,83 @@
+import copy
+import numpy as np
+from constants.shape import Shape
+from puzzles.face_generator_definition import FaceGeneratorDefinition
+from puzzles.puzzle_topology import FaceTopology
+
+
+class ArrayPuzzleFace:
+  """
+  PuzzleFace without per-node and per-polygon objects. Nodes are described
+  by parallel arrays, polygons by a CSR list of node positions, and the
+  active polygons by a boolean mask.
+
+  It answers the same geometry queries as PuzzleFace (terrain_uvs,
+  carve_uvs, carve_edge_count_indices, wall_uv_lines) so Face and
+  PathHighlight can build from either.
+  """
+
+  def __init__(self, shape: Shape, depth: int, face_idx: int, topology: FaceTopology):
+    self.depth = depth
+    self.face_idx = face_idx
+    self.generator_definition = FaceGeneratorDefinition.from_shape(shape)
+    self.rotations = 0
+
+    # Nodes
+    self.node_ring = topology.node_indices[:, 0].astype('i4')
+    self.node_count = topology.node_indices[:, 1].astype('i4')
+    self.node_uvs = topology.node_uvs
+    self.node_is_edge = self.node_ring == depth
+    vertices_per_segment = self.generator_definition.vertices_per_segment_per_ring * self.node_ring
+    self.node_segment_idx = np.where(
+      vertices_per_segment > 0,
+      self.node_count // np.maximum(vertices_per_segment, 1),
+      -1,
+    )
+
+    # Polygons
+    self.polygon_offsets = topology.polygon_offsets.astype('i4')
+    self.polygon_nodes = topology.polygon_nodes.astype('i4')
+    self.active_polygon_mask = topology.polygon_active.astype('?')
+    (self._polygon_of_entry, self._previous_entry, edge_ids) = topology.edge_index()
+    self.polygon_is_edge = np.bincount(
+      self._polygon_of_entry,
+      weights=self.node_is_edge[self.polygon_nodes],
+      minlength=self.polygon_count,
+    ) >= 2
+    self._entry_borders_inactive = topology.entries_bordering_inactive(
+      self._polygon_of_entry, edge_ids
+    )
+    self.active_polygon_pairs = topology.active_polygon_pairs(self._polygon_of_entry, edge_ids)
+
+  def copy(self):
+    face = copy.copy(self)
+    face.rotations = 0
+    return face
+
+  @property
+  def polygon_count(self):
+    return len(self.active_polygon_mask)
+
+  def _entries_where_active(self, is_active: bool):
+    return self.active_polygon_mask[self._polygon_of_entry] == is_active
+
+  def terrain_uvs(self):
+    return self.node_uvs[self.polygon_nodes[self._entries_where_active(False)]]
+
+  def carve_uvs(self):
+    return self.node_uvs[self.polygon_nodes[self._entries_where_active(True)]]
+
+  def carve_edge_count_indices(self):
+    carve_nodes = self.polygon_nodes[self._entries_where_active(True)]
+    return np.where(self.node_is_edge[carve_nodes], self.node_count[carve_nodes], -1)
+
+  def wall_uv_lines(self):
+    wall_entries = self._entries_where_active(True) & self._entry_borders_inactive
+    line_nodes = np.stack([
+      self.polygon_nodes[wall_entries],
+      self.polygon_nodes[self._previous_entry[wall_entries]],
+    ], axis=1)
+    return self.node_uvs[line_nodes]
+
+  def rotate(self, rotations: int):
+    self.rotations = rotations
@@ -0,0 +1,165 @@
+"""
+Packed binary form of the generated puzzles.
+
+Every section is little-endian and 4-byte aligned so it can be handed to
+numpy straight out of a memory map:
+
+  header      magic, version, shape name, depth, face count, uv step
+  face table  (node count, polygon count, polygon node count, data offset)
+              for every face
+  face data   node indices   u2 (N, 2)
+              quantized uvs  i2 (N, 2)
+              polygon offset u4 (P + 1)
+              polygon nodes  u2 (M)
+              is_active      u1 (P)
+
+Compile with `python -m puzzles.puzzle_binary` from the game directory.
+"""
+import json
+import mmap
+import os
+import struct
+import numpy as np
+
+from constants.shape import Shape
+from puzzles.puzzle_topology import FaceTopology, PuzzleTopology
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+GENERATED_DIRECTORY = os.path.join(dir_path, 'generated')
+COMPILED_DIRECTORY = os.path.join(dir_path, 'compiled')
+
+MAGIC = b'PZBN'
+VERSION = 1
+HEADER = struct.Struct('<4sH16sHH2xf')
+FACE_ENTRY = struct.Struct('<IIII')
+
+# uv coordinates stay well inside [-2, 2), so a 1/16384 step fits them in an i2
+UV_STEP = 1.0 / 16384
+
+
+def compiled_puzzle_path(puzzle_file_name: str):
+  return os.path.join(COMPILED_DIRECTORY, f'{puzzle_file_name}.bin')
+
+
+def generated_puzzle_path(puzzle_file_name: str):
+  return os.path.join(GENERATED_DIRECTORY, f'{puzzle_file_name}.json')
+
+
+def is_compiled_puzzle_current(puzzle_file_name: str):
+  binary_path = compiled_puzzle_path(puzzle_file_name)
+  if not os.path.exists(binary_path):
+    return False
+  return os.path.getmtime(binary_path) >= os.path.getmtime(generated_puzzle_path(puzzle_file_name))
+
+
+def _align(offset: int):
+  return (offset + 3) & ~3
+
+
+def _face_sections(face: FaceTopology):
+  quantized_uvs = np.rint(face.node_uvs / UV_STEP).astype('<i2')
+  return [
+    face.node_indices.astype('<u2'),
+    quantized_uvs,
+    face.polygon_offsets.astype('<u4'),
+    face.polygon_nodes.astype('<u2'),
+    face.polygon_active.astype('u1'),
+  ]
+
+
+def write_puzzle_binary(topology: PuzzleTopology, path: str):
+  face_count = len(topology.faces)
+  offset = HEADER.size + FACE_ENTRY.size * face_count
+  face_table = []
+  face_data = []
+  for face in topology.faces:
+    offset = _align(offset)
+    face_table.append(FACE_ENTRY.pack(
+      face.node_count, face.polygon_count, len(face.polygon_nodes), offset
+    ))
+    for section in _face_sections(face):
+      section_bytes = section.tobytes()
+      face_data.append((offset, section_bytes))
+      offset = _align(offset + len(section_bytes))
+
+  buffer = bytearray(offset)
+  buffer[0:HEADER.size] = HEADER.pack(
+    MAGIC, VERSION, topology.shape.value.encode('ascii'), topology.depth, face_count, UV_STEP
+  )
+  table_bytes = b''.join(face_table)
+  buffer[HEADER.size:HEADER.size + len(table_bytes)] = table_bytes
+  for (section_offset, section_bytes) in face_data:
+    buffer[section_offset:section_offset + len(section_bytes)] = section_bytes
+
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, 'wb') as fp:
+    fp.write(buffer)
+
+
+def read_puzzle_binary(path: str):
+  """
+  Memory-map a compiled puzzle. The index arrays are views straight into the
+  map; only the uv coordinates are copied while being dequantized.
+  """
+  with open(path, 'rb') as fp:
+    buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+  (magic, version, shape_name, depth, face_count, uv_step) = HEADER.unpack_from(buffer, 0)
+  if magic != MAGIC or version != VERSION:
+    raise ValueError(f'{path} is not a version {VERSION} compiled puzzle')
+
+  faces = []
+  for face_idx in range(face_count):
+    (node_count, polygon_count, polygon_node_count, offset) = FACE_ENTRY.unpack_from(
+      buffer, HEADER.size + FACE_ENTRY.size * face_idx
+    )
+    sections = []
+    for (dtype, count) in [
+      ('<u2', node_count * 2),
+      ('<i2', node_count * 2),
+      ('<u4', polygon_count + 1),
+      ('<u2', polygon_node_count),
+      ('u1', polygon_count),
+    ]:
+      section = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+      sections.append(section)
+      offset = _align(offset + section.nbytes)
+
+    (node_indices, quantized_uvs, polygon_offsets, polygon_nodes, polygon_active) = sections
+    faces.append(FaceTopology(
+      node_indices.reshape(node_count, 2),
+      quantized_uvs.reshape(node_count, 2) * uv_step,
+      polygon_offsets,
+      polygon_nodes,
+      polygon_active.view('?'),
+    ))
+
+  return PuzzleTopology(Shape(shape_name.rstrip(b'\0').decode('ascii')), depth, faces)
+
+
+def compile_puzzle(puzzle_file_name: str):
+  with open(generated_puzzle_path(puzzle_file_name), 'r') as fp:
+    topology = PuzzleTopology.from_json(json.load(fp))
+  write_puzzle_binary(topology, compiled_puzzle_path(puzzle_file_name))
+
+
+def compile_all_puzzles():
+  compiled = []
+  for file_name in sorted(os.listdir(GENERATED_DIRECTORY)):
+    (puzzle_file_name, extension) = os.path.splitext(file_name)
+    if extension != '.json':
+      continue
+    try:
+      compile_puzzle(puzzle_file_name)
+    except KeyError:
+      # Older generator output without polygons can't be played anyway
+      print(f'Skipping {puzzle_file_name}: not a polygon puzzle')
+      continue
+    compiled.append(puzzle_file_name)
+  return compiled
+
+
+if __name__ == '__main__':
+  for puzzle_file_name in compile_all_puzzles():
+    print(f'Compiled {puzzle_file_name}')
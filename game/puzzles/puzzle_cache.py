@@ -0,0 +1,40 @@
+from collections import OrderedDict
+import os
+
+from puzzles.puzzle_binary import generated_puzzle_path
+
+
+class PuzzleCache:
+  """
+  Least-recently-used cache of loaded puzzles, keyed by puzzle file name.
+  An entry is reloaded when its json source has been modified since it was
+  cached.
+  """
+
+  def __init__(self, max_size: int, load: callable):
+    self.max_size = max_size
+    self._load = load
+    self._entries = OrderedDict()
+
+  def get(self, puzzle_file_name: str):
+    mtime = os.stat(generated_puzzle_path(puzzle_file_name)).st_mtime_ns
+    entry = self._entries.get(puzzle_file_name)
+    if entry is not None and entry[0] == mtime:
+      self._entries.move_to_end(puzzle_file_name)
+      return entry[1]
+
+    value = self._load(puzzle_file_name)
+    self._entries[puzzle_file_name] = (mtime, value)
+    self._entries.move_to_end(puzzle_file_name)
+    while len(self._entries) > self.max_size:
+      self._entries.popitem(last=False)
+    return value
+
+  def clear(self):
+    self._entries.clear()
+
+  def __contains__(self, puzzle_file_name: str):
+    return puzzle_file_name in self._entries
+
+  def __len__(self):
+    return len(self._entries)
@@ -1,44 +1,99 @@
+import copy
+import numpy as np
 from constants.shape import Shape
 from puzzles.puzzle_polygon import PuzzlePolygon
 from puzzles.face_generator_definition import FaceGeneratorDefinition
 from puzzles.puzzle_node import PuzzleNode
+from puzzles.puzzle_topology import FaceTopology
 
 
 class PuzzleFace:
-  def __init__(self, shape: Shape, depth: int, face_idx: int, face_json: dict):
+  def __init__(self, shape: Shape, depth: int, face_idx: int, topology: FaceTopology):
     self.depth = depth
     self.face_idx = face_idx
     self.generator_definition = FaceGeneratorDefinition.from_shape(shape)
-    self.nodes = [[None] * (self.generator_definition.vertex_count_for_ring(ringIx)) for ringIx in range(depth+1)]
-    self.polygons = []
-    self.active_polygons = set()
     self.rotations = 0
 
-    # Create all nodes
-    for vertex in face_json['vertices']:
-      indices = (vertex['indices'])
-      node = PuzzleNode.from_node_json(self, vertex)
+    node_list = self._create_nodes(topology)
+    self._create_polygons(topology, node_list)
+    self._associate_active_polygons(topology)
+
+  # The loading phases, kept apart so benchmarks.puzzle_load can time them
+
+  def _create_nodes(self, topology: FaceTopology):
+    """
+    @returns: the nodes in the topology's order
+    """
+    self.nodes = [[None] * (self.generator_definition.vertex_count_for_ring(ringIx)) for ringIx in range(self.depth+1)]
+    node_list = []
+    for (position, (indices, uv_coordinates)) in enumerate(zip(topology.node_indices.tolist(), topology.node_uvs.tolist())):
+      node = PuzzleNode(self, tuple(indices), uv_coordinates, position)
       self.nodes[indices[0]][indices[1]] = node
+      node_list.append(node)
+    return node_list
 
+  def _create_polygons(self, topology: FaceTopology, node_list: list[PuzzleNode]):
     # Create polygons between nodes
-    for polygon in face_json['polygons']:
-      polygon_indices = polygon['indices']
-      polygon_nodes = [self.nodes[indices[0]][indices[1]] for indices in polygon_indices]
+    self.polygons = []
+    self.active_polygons = set()
+    polygon_offsets = topology.polygon_offsets.tolist()
+    polygon_node_positions = topology.polygon_nodes.tolist()
+    for (polygon_idx, is_active) in enumerate(topology.polygon_active.tolist()):
+      edge_offset = polygon_offsets[polygon_idx]
+      polygon_nodes = [
+        node_list[node_position]
+        for node_position in polygon_node_positions[edge_offset:polygon_offsets[polygon_idx + 1]]
+      ]
 
-      polygon = PuzzlePolygon(self, polygon_nodes, polygon['is_active'])
+      polygon = PuzzlePolygon(self, polygon_nodes, is_active, edge_offset)
       self.polygons.append(polygon)
       if polygon.is_active:
         self.active_polygons.add(polygon)
-      for node in polygon_nodes:
-        node.polygons.add(polygon)
+
+  def _associate_active_polygons(self, topology: FaceTopology):
+    # Shared-edge index: every polygon edge, keyed by the edge it lies on
+    (entry_polygons, _previous_entries, edge_ids) = topology.edge_index()
+    self.edge_borders_inactive = topology.entries_bordering_inactive(
+      entry_polygons, edge_ids
+    ).tolist()
 
     # Associate Active Polygons
-    for polygon_a in list(self.active_polygons):
-      for polygon_b in list(self.active_polygons):
-        if polygon_a == polygon_b:
-          continue
-        if polygon_a.mates_with(polygon_b):
-          polygon_a.associate(polygon_b)
+    for (polygon_a_idx, polygon_b_idx) in topology.active_polygon_pairs(entry_polygons, edge_ids).tolist():
+      self.polygons[polygon_a_idx].associate(self.polygons[polygon_b_idx])
+
+  def copy(self):
+    # Nodes and polygons are shared; they keep pointing at the face that built them
+    face = copy.copy(self)
+    face.rotations = 0
+    return face
+
+  def terrain_uvs(self):
+    return np.array([
+      node.uv_coordinates
+      for polygon in self.polygons if not polygon.is_active
+      for node in polygon.nodes
+    ], dtype='f8').reshape(-1, 2)
+
+  def carve_uvs(self):
+    return np.array([
+      node.uv_coordinates
+      for polygon in self.polygons if polygon.is_active
+      for node in polygon.nodes
+    ], dtype='f8').reshape(-1, 2)
+
+  def carve_edge_count_indices(self):
+    return np.array([
+      node.indices[1] if node.is_edge else -1
+      for polygon in self.polygons if polygon.is_active
+      for node in polygon.nodes
+    ], dtype='i4')
+
+  def wall_uv_lines(self):
+    return np.array([
+      [line_node.uv_coordinates for line_node in line_nodes]
+      for polygon in self.polygons if polygon.is_active
+      for line_nodes in polygon.get_inactive_neighbor_lines()
+    ], dtype='f8').reshape(-1, 2, 2)
 
   def edge_nodes_for_segment(self, segment_idx: int):
     self.generator_definition.vertex_range_for_segment(segment_idx, self.depth)
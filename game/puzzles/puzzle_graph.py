@@ -3,34 +3,57 @@ import os
 from puzzles.face_generator_definition import FaceGeneratorDefinition
 
 from puzzles.puzzle_face import PuzzleFace
-
-dir_path = os.path.dirname(os.path.realpath(__file__))
+from puzzles.array_puzzle_face import ArrayPuzzleFace
+from puzzles.puzzle_topology import PuzzleTopology
+from puzzles.puzzle_cache import PuzzleCache
+from puzzles.puzzle_binary import (
+  compiled_puzzle_path,
+  generated_puzzle_path,
+  is_compiled_puzzle_current,
+  read_puzzle_binary,
+)
 
 from constants.shape import Shape
+from engine.trace import tracer
 from puzzles.shape_face_ridges import ShapeFaceRidges
 
+# Enough for every puzzle of every level plus the tutorial
+PUZZLE_CACHE_SIZE = 24
+
 def get_puzzle_file(puzzle_file_name: str):
-  with open(os.path.join(dir_path, 'generated', f'{puzzle_file_name}.json'), 'r') as fp:
+  with open(generated_puzzle_path(puzzle_file_name), 'r') as fp:
     puzzle_json_str = fp.read()
     return json.loads(puzzle_json_str)
 
+def get_puzzle_topology(puzzle_file_name: str):
+  # Prefer the compiled binary, but never one older than its json source
+  if is_compiled_puzzle_current(puzzle_file_name):
+    try:
+      return read_puzzle_binary(compiled_puzzle_path(puzzle_file_name))
+    except ValueError:
+      pass
+  return PuzzleTopology.from_json(get_puzzle_file(puzzle_file_name))
+
 
 class PuzzleGraph():
   @staticmethod
   def from_file_name(puzzle_file_name: str):
-    puzzle_json = get_puzzle_file(puzzle_file_name)
-    return PuzzleGraph(puzzle_json)
+    # The cached graph is never handed out, so its faces always stay unrotated
+    return puzzle_cache.get(puzzle_file_name).copy()
+
+  @staticmethod
+  def from_json(puzzle_json: dict, face_class=PuzzleFace):
+    return PuzzleGraph(PuzzleTopology.from_json(puzzle_json), face_class)
 
-  def __init__(self, puzzle_json: dict):
-    self.shape = Shape[puzzle_json['shape']]
+  def __init__(self, topology: PuzzleTopology, face_class=PuzzleFace):
+    self.shape = topology.shape
     self.coordinate_system = FaceGeneratorDefinition.from_shape(self.shape)
-    self.depth = puzzle_json['depth']
+    self.depth = topology.depth
 
-    faces = puzzle_json['faces']
     self.faces = []
 
-    for (face_idx, face_definition) in enumerate(faces):
-      face = PuzzleFace(self.shape, self.depth, face_idx, face_definition)
+    for (face_idx, face_topology) in enumerate(topology.faces):
+      face = face_class(self.shape, self.depth, face_idx, face_topology)
       self.faces.append(face)
 
   #   self._associate_ridge_polygons()
@@ -75,6 +98,18 @@ class PuzzleGraph():
   #       polygon_a.associate(polygon_b) # method automatically bidirectionally associates
 
 
+  def copy(self):
+    """
+    A new graph sharing this graph's nodes and polygons, which never change
+    after loading. Only face rotations belong to the copy.
+    """
+    graph = PuzzleGraph.__new__(PuzzleGraph)
+    graph.shape = self.shape
+    graph.coordinate_system = self.coordinate_system
+    graph.depth = self.depth
+    graph.faces = [face.copy() for face in self.faces]
+    return graph
+
   def collect_polygons(self):
     return [polygon for face in self.faces for polygon in face.polygons]
 
@@ -88,9 +123,12 @@ class PuzzleGraph():
     return True
 
 
+def _load_puzzle_graph(puzzle_file_name: str):
+  face_class = ArrayPuzzleFace if os.environ.get("ARRAY_FACES", None) == "1" else PuzzleFace
+  with tracer.span("load puzzle topology", "load", puzzle=puzzle_file_name):
+    topology = get_puzzle_topology(puzzle_file_name)
+  with tracer.span("build puzzle graph", "load", puzzle=puzzle_file_name):
+    return PuzzleGraph(topology, face_class)
 
 
-
-
-
-
+puzzle_cache = PuzzleCache(PUZZLE_CACHE_SIZE, _load_puzzle_graph)
@@ -16,11 +16,13 @@ class PuzzleNode:
     face: int,
     indices: tuple[int,int],
     uv_coordinates: tuple[int,int],
+    position: int = 0,
   ):
     self.face = face
+    # Where the node sits in the face's node list, unique within the face
+    self.position = position
     self.indices = indices
     self.uv_coordinates = uv_coordinates
-    self.polygons = set()
     self.is_edge = indices[0] == face.depth
     self.segment_idx = face.generator_definition.segment_for_vertex(indices[0], indices[1])
     self.node_key = f"{str(self.face.face_idx)},{','.join([str(idx) for idx in self.indices])}"
@@ -1,8 +1,10 @@
 
 
 class PuzzlePolygon:
-  def __init__(self, face, nodes: list, is_active: bool):
+  def __init__(self, face, nodes: list, is_active: bool, edge_offset: int = 0):
     self.face = face
+    # Where this polygon's edges start in the face's shared-edge index
+    self.edge_offset = edge_offset
     self.nodes = nodes
     self.nodes_set = set(nodes)
     self.is_edge = len([node for node in self.nodes if node.is_edge]) >= 2
@@ -33,17 +35,21 @@ class PuzzlePolygon:
     return len(self.nodes_set.intersection(another_polygon.nodes_set)) == 2
 
 
-  def get_inactive_neighbor_lines(self):
-    inactive_neighbor_lines = []
+  def edges(self):
     for ix, this_node in enumerate(self.nodes):
       prev_node = self.nodes[
         len(self.nodes) - 1 if ix == 0 else ix - 1
       ]
-      common_polygons = this_node.polygons.intersection(prev_node.polygons)
-      for polygon in common_polygons:
-        if polygon != self and not polygon.is_active:
-          inactive_neighbor_lines.append((this_node, prev_node))
-    return inactive_neighbor_lines
+      yield (this_node, prev_node)
+
+
+  def get_inactive_neighbor_lines(self):
+    borders_inactive = self.face.edge_borders_inactive
+    return [
+      edge
+      for (ix, edge) in enumerate(self.edges())
+      if borders_inactive[self.edge_offset + ix]
+    ]
 
 
   def is_resonant(self, path_so_far: set['PuzzlePolygon']):
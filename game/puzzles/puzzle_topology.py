@@ -0,0 +1,131 @@
+import numpy as np
+from constants.shape import Shape
+
+
+class FaceTopology:
+  """
+  The static layout of one puzzle face, stored as flat arrays.
+
+  node_indices:     (N, 2) ring and count index of every node
+  node_uvs:         (N, 2) uv coordinates of every node
+  polygon_offsets:  (P + 1,) offsets into polygon_nodes, polygon i owns
+                    polygon_nodes[polygon_offsets[i]:polygon_offsets[i+1]]
+  polygon_nodes:    (M,) positions into the node arrays
+  polygon_active:   (P,) whether the polygon is part of the path
+  """
+
+  @staticmethod
+  def from_face_json(face_json: dict):
+    vertices = face_json['vertices']
+    node_positions = {}
+    node_indices = np.empty((len(vertices), 2), dtype='u2')
+    node_uvs = np.empty((len(vertices), 2), dtype='f8')
+    for (node_idx, vertex) in enumerate(vertices):
+      indices = tuple(vertex['indices'])
+      node_positions[indices] = node_idx
+      node_indices[node_idx] = indices
+      node_uvs[node_idx] = vertex['coordinates']
+
+    polygons = face_json['polygons']
+    polygon_offsets = np.zeros(len(polygons) + 1, dtype='u4')
+    polygon_nodes = []
+    polygon_active = np.empty(len(polygons), dtype='?')
+    for (polygon_idx, polygon) in enumerate(polygons):
+      polygon_nodes.extend(node_positions[tuple(indices)] for indices in polygon['indices'])
+      polygon_offsets[polygon_idx + 1] = len(polygon_nodes)
+      polygon_active[polygon_idx] = polygon['is_active']
+
+    return FaceTopology(
+      node_indices,
+      node_uvs,
+      polygon_offsets,
+      np.array(polygon_nodes, dtype='u2'),
+      polygon_active,
+    )
+
+  def __init__(
+    self,
+    node_indices: np.ndarray,
+    node_uvs: np.ndarray,
+    polygon_offsets: np.ndarray,
+    polygon_nodes: np.ndarray,
+    polygon_active: np.ndarray,
+  ):
+    self.node_indices = node_indices
+    self.node_uvs = node_uvs
+    self.polygon_offsets = polygon_offsets
+    self.polygon_nodes = polygon_nodes
+    self.polygon_active = polygon_active
+
+  @property
+  def node_count(self):
+    return len(self.node_indices)
+
+  @property
+  def polygon_count(self):
+    return len(self.polygon_active)
+
+  def edge_index(self):
+    """
+    Groups the polygon_nodes entries by the edge they start, where an entry's
+    edge runs from its node back to the previous node of the same polygon.
+
+    Returns per entry: the polygon it belongs to, the previous entry in that
+    polygon, and an edge id shared by every entry lying on the same edge.
+    """
+    polygon_sizes = np.diff(self.polygon_offsets.astype('i8'))
+    entry_polygons = np.repeat(np.arange(len(polygon_sizes)), polygon_sizes)
+    entry_positions = np.arange(len(self.polygon_nodes))
+    polygon_starts = self.polygon_offsets[:-1].astype('i8')[entry_polygons]
+    polygon_ends = self.polygon_offsets[1:].astype('i8')[entry_polygons]
+    previous_entries = np.where(
+      entry_positions == polygon_starts, polygon_ends - 1, entry_positions - 1
+    )
+
+    this_nodes = self.polygon_nodes.astype('i8')
+    previous_nodes = this_nodes[previous_entries]
+    edge_keys = (
+      np.minimum(this_nodes, previous_nodes) * self.node_count
+      + np.maximum(this_nodes, previous_nodes)
+    )
+    (_, edge_ids) = np.unique(edge_keys, return_inverse=True)
+    return (entry_polygons, previous_entries, edge_ids.reshape(-1))
+
+  def entries_bordering_inactive(self, entry_polygons: np.ndarray, edge_ids: np.ndarray):
+    """
+    For every entry, whether its edge is shared with an inactive polygon
+    other than the entry's own.
+    """
+    entry_inactive = ~self.polygon_active[entry_polygons]
+    inactive_per_edge = np.bincount(edge_ids, weights=entry_inactive)
+    return inactive_per_edge[edge_ids] - entry_inactive > 0
+
+  def active_polygon_pairs(self, entry_polygons: np.ndarray, edge_ids: np.ndarray):
+    """
+    (K, 2) array of active polygons sharing an edge, each pair listed once.
+    """
+    active_entries = np.nonzero(self.polygon_active[entry_polygons])[0]
+    order = np.argsort(edge_ids[active_entries], kind='stable')
+    sorted_entries = active_entries[order]
+    sorted_edges = edge_ids[sorted_entries]
+    # Lattice edges border at most two polygons, so neighbors end up adjacent
+    is_shared = sorted_edges[1:] == sorted_edges[:-1]
+    return np.stack([
+      entry_polygons[sorted_entries[:-1][is_shared]],
+      entry_polygons[sorted_entries[1:][is_shared]],
+    ], axis=1)
+
+
+class PuzzleTopology:
+  @staticmethod
+  def from_json(puzzle_json: dict):
+    return PuzzleTopology(
+      Shape[puzzle_json['shape']],
+      puzzle_json['depth'],
+      [FaceTopology.from_face_json(face_json) for face_json in puzzle_json['faces']],
+    )
+
+  def __init__(self, shape: Shape, depth: int, faces: list[FaceTopology]):
+    self.shape = shape
+    self.depth = depth
+    self.faces = faces
@@ -10,6 +10,8 @@ from ui.image_plane import ImagePlane
 from ui.next_button import NextButton
 from puzzles.puzzle_graph import PuzzleGraph
 from engine.camera import Camera
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
 from engine.events import (
     NEXT_PUZZLE,
     emit_event,
@@ -30,6 +32,11 @@ from scenes.skybox import Skybox
 
 
 class GameplayScene(Renderable):
+    EVENT_TYPES = (
+        PUZZLE_SOLVED, NEXT_PUZZLE, PUZZLE_EXITED, NEXT_LEVEL,
+        *Polyhedron.EVENT_TYPES, *NextButton.EVENT_TYPES,
+    )
+
     def __init__(self, ctx: moderngl.Context, camera: Camera):
         self.ctx = ctx
         self.camera = camera
@@ -66,22 +73,25 @@ class GameplayScene(Renderable):
             self._end_puzzle()
         self.next_button.set_active(False)
 
+    @tracer.traced(category="transition")
     def init(self):
         self._start_puzzle(True)
         self.skybox.start(self.current_level_index)
 
+    @tracer.traced(category="load")
     def _load_puzzles(self):
         level = LEVELS[self.current_level_index]
         self.puzzles = []
         puzzles_in_level = level["puzzles"]
         for puzzle in puzzles_in_level:
-            level_poly = Polyhedron(
-                self.ctx,
-                self.camera,
-                SHAPE_VERTICES[level["shape"]],
-                PuzzleGraph.from_file_name(puzzle),
-                style=level["style"],
-            )
+            with tracer.span("load puzzle", "load", puzzle=puzzle):
+                level_poly = Polyhedron(
+                    self.ctx,
+                    self.camera,
+                    SHAPE_VERTICES[level["shape"]],
+                    PuzzleGraph.from_file_name(puzzle),
+                    style=level["style"],
+                )
             if os.environ.get("OVER_EASY", None) != "1":
                 level_poly.scramble()
             self.puzzles.append(level_poly)
@@ -104,6 +114,7 @@ class GameplayScene(Renderable):
     def current_puzzle(self):
         return self.puzzles[self.current_puzzle_index]
 
+    @tracer.traced(category="transition")
     def advance(self):
         self.current_puzzle().destroy()
         puzzles_count = len(self.puzzles)
@@ -142,13 +153,21 @@ class GameplayScene(Renderable):
 
         self.next_button.handle_event(event, world_time)
 
+    def update(self, delta_time: float):
+        if self.current_puzzle().is_alive:
+            self.current_puzzle().update(delta_time)
+
     def render(self, delta_time: int):
-        self.skybox.render(delta_time)
+        with gpu_profiler.section("skybox"):
+            self.skybox.render(delta_time)
         if self.current_puzzle().is_alive:
-            self.current_puzzle().render(delta_time)
-        self.progress.render(delta_time)
+            with gpu_profiler.section("polyhedron"):
+                self.current_puzzle().render(delta_time)
+        with gpu_profiler.section("progress"):
+            self.progress.render(delta_time)
         if self.next_button.is_active():
-            self.next_button.render(delta_time)
+            with gpu_profiler.section("next_button"):
+                self.next_button.render(delta_time)
 
     def destroy(self):
         self.progress.destroy()
@@ -2,7 +2,7 @@ import math
 import random
 import glm
 
-from engine.animation import Animator, AnimationLerpFunction, AnimationLerper
+from engine.animation import LoopingAnimation, AnimationLerpFunction, AnimationLerper
 from engine.shader import get_shader_program
 from engine.shadeable_object import ShadeableObject
 from constants.dimensions import SCREEN_DIMENSIONS
@@ -19,14 +19,15 @@ class Skybox(Plane):
         position = glm.vec3(0, 0, 21)
         dimensions = glm.vec2(SCREEN_DIMENSIONS)
         super().__init__(ctx, camera_matrix, position, dimensions)
-        self.obj.shader["u_resolution"].write(dimensions)
-        self.obj.shader["level"] = 0
-        self.obj.shader["random_pos"].write(glm.vec2(random.random(), random.random()))
+        self.obj.set_uniform("u_resolution", dimensions)
+        self.obj.set_uniform("level", 0)
+        self.obj.set_uniform("random_pos", glm.vec2(random.random(), random.random()))
         self.ready = False
 
-        self.animator = Animator(
+        self.animation = LoopingAnimation(
             AnimationLerper(AnimationLerpFunction.ease_in_out, LOOP_TIME),
-            -math.pi,  # start value
+            -math.pi,
+            math.pi,
             reversible=True,
         )
 
@@ -42,14 +43,14 @@ class Skybox(Plane):
 
     def start(self, level=0):
         self.ready = True
-        self.animator.start(math.pi)
-        self.obj.shader["level"] = level
+        self.animation.start()
+        self.obj.set_uniform("level", level)
 
     def stop(self):
-        self.animator.stop()
+        self.animation.stop()
 
     def render(self, delta_time: int):
         if self.ready:
-            t = self.animator.frame(delta_time)
+            t = self.animation.value()
             self.obj.shader["u_time"] = t
             return super().render()
@@ -26,6 +26,9 @@ class TestScene(Renderable):
     def handle_events(self, delta_time: int):
         self.subject.handle_events(delta_time)
 
+    def update(self, delta_time: float):
+        self.subject.update(delta_time)
+
     def render(self, delta_time: int):
         self.ctx.clear(color=Colors.WHITE)
         self.subject.render(delta_time)
@@ -13,10 +13,17 @@ from models.polyhedron import Polyhedron
 from puzzles.puzzle_graph import PuzzleGraph
 from engine.renderable import Renderable
 from engine.camera import Camera
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
 from engine.events import FADE_OUT, FADED_OUT, FACE_ACTIVATED, DONE_RESONATE, ARCBALL_MOVE, PUZZLE_SOLVED, SCENE_FINISH, emit_event
 
 
 class TutorialScene(Renderable):
+    EVENT_TYPES = (
+        ARCBALL_MOVE, FACE_ACTIVATED, DONE_RESONATE, PUZZLE_SOLVED,
+        *Polyhedron.EVENT_TYPES,
+    )
+
     def __init__(self, ctx: moderngl.Context, camera: Camera):
         self.ctx = ctx
         self.camera = camera
@@ -47,6 +54,7 @@ class TutorialScene(Renderable):
         self.subject.scramble({2: 1})
         self.step = None
 
+    @tracer.traced(category="transition")
     def init(self):
         self.subject.reset()
         self.subject.scramble({2: 1})
@@ -125,13 +133,20 @@ class TutorialScene(Renderable):
       self._destroy_tutorial_obj()
       emit_event(FADE_OUT)
 
+    def update(self, delta_time: float):
+      if self.step is not None:
+        self.subject.update(delta_time)
+
     def render(self, delta_time: int):
       if self.step is not None:
-        self.subject.render(delta_time)
+        with gpu_profiler.section("polyhedron"):
+          self.subject.render(delta_time)
         if self.tutorial_obj is not None:
-          self.tutorial_obj.render(delta_time, self.subject.m_model)
+          with gpu_profiler.section("tutorial_highlight"):
+            self.tutorial_obj.render(delta_time, self.subject.m_model)
         if self.message is not None:
-          self.message.render(delta_time)
+          with gpu_profiler.section("tutorial_message"):
+            self.message.render(delta_time)
 
     def destroy(self):
         self.subject.destroy()
@@ -2,7 +2,9 @@ import moderngl
 from constants.colors import Colors
 from engine.renderable import Renderable
 from engine.camera import Camera
-from engine.animation import Animator
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
+from engine.animation import Animator, animation_scheduler
 from engine.animation import AnimationLerpFunction, AnimationLerper
 from models.starfield import make_starfield
 from engine.events import emit_event, LEVEL_LOADED, PUZZLE_LOADED, FADE_IN
@@ -20,11 +22,15 @@ class WinScene(Renderable):
 
         self.starfield = make_starfield(ctx)
         self.camera_animator = Animator(
-            AnimationLerper(AnimationLerpFunction.ease_in_out, INTRO_DURATION), -12
+            AnimationLerper(AnimationLerpFunction.ease_in_out, INTRO_DURATION), -12,
+            on_frame=self.camera.set_z,
+            on_stop=self.camera.set_z,
+            system=animation_scheduler,
         )
 
         self.planets = SolarSystem(ctx, camera)
 
+    @tracer.traced(category="transition")
     def init(self):
         emit_event(LEVEL_LOADED, {"song": SoundtrackSong.win})
         emit_event(PUZZLE_LOADED)
@@ -35,16 +41,19 @@ class WinScene(Renderable):
     # def handle_event(self, event: pygame.event.Event, world_time: int):
     #     self.subject.handle_event(event, world_time)
 
+    def update(self, delta_time: float):
+        self.planets.update(delta_time)
+
     def render(self, delta_time: int):
         self.ctx.clear(color=Colors.BLACK)
-        if self.camera_animator.is_animating:
-            self.camera.set_z(self.camera_animator.frame(delta_time))
-        self.starfield.render(
-            uniforms={"m_mvp": self.camera.view_projection_matrix},
-            mode=moderngl.TRIANGLES,
-        )
-        self.starfield.render()
-        self.planets.render(delta_time)
+        with gpu_profiler.section("starfield"):
+            self.starfield.render(
+                uniforms={"m_mvp": self.camera.view_projection_matrix},
+                mode=moderngl.TRIANGLES,
+            )
+            self.starfield.render()
+        with gpu_profiler.section("solar_system"):
+            self.planets.render(delta_time)
 
     # def destroy(self):
     #     self.subject.destroy()
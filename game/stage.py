@@ -5,6 +5,11 @@ import moderngl
 from engine.audio.soundtrack import Soundtrack, SoundtrackSong
 from engine.camera import Camera
 from engine.renderable import Renderable
+from engine.animation import animation_scheduler, animation_activity
+from engine.gpu_profiler import gpu_profiler
+from engine.trace import tracer
+from engine.render_stats import render_stats
+from engine.events.mouse import coalesce_mouse_motion
 from scenes.tutorial_scene import TutorialScene
 from scenes.gameplay_scene import GameplayScene
 from scenes.win_scene import WinScene
@@ -12,6 +17,7 @@ from scenes.test_scene import TestScene
 from ui.action_menu import ActionMenu
 from ui.fader import Fader
 from ui.intro_plane import IntroPlane
+from ui.perf_hud import PerfHud
 from engine.events import (
     SCENE_FINISH,
     FADE_IN,
@@ -20,12 +26,18 @@ from engine.events import (
     LEVEL_LOADED,
     PUZZLE_LOADED,
     emit_event,
+    event_bus,
 )
 
 
 class Stage:
     def __init__(self, ctx: moderngl.Context):
         self.ctx = ctx
+        gpu_profiler.use_context(ctx)
+        # PERF_HUD=1 overlays frame and render stats, counted from here on
+        is_perf_hud_enabled = os.environ.get("PERF_HUD", None) == "1"
+        if is_perf_hud_enabled:
+            render_stats.install()
 
         # The camera matrix doesn't move in this game, so we can instantiate it here and never have to update it
         self.camera = Camera(self.ctx)
@@ -60,12 +72,32 @@ class Stage:
         )
         self.intro.init()
 
+        self.perf_hud = PerfHud(self.ctx) if is_perf_hud_enabled else None
+
         self.soundtrack = Soundtrack()
         self.soundtrack.set_volume(0.5)
 
+        # Subscribed in the order the handlers used to be called in
+        self.router = event_bus
+        self.router.subscribe([SCENE_FINISH, FADED_OUT], self._handle_stage_event)
+        self.router.subscribe(
+            [
+                *self.tutorial.EVENT_TYPES,
+                *self.gameplay.EVENT_TYPES,
+                *self.win.EVENT_TYPES,
+            ],
+            self._handle_scene_event,
+        )
+        self.router.subscribe(self.fader.EVENT_TYPES, self.fader.handle_event)
+        self.router.subscribe(self.action_menu.EVENT_TYPES, self.action_menu.handle_event)
+        self.router.subscribe(self.soundtrack.EVENT_TYPES, self.soundtrack.handle_event)
+        if self.perf_hud:
+            self.router.subscribe(self.perf_hud.EVENT_TYPES, self.perf_hud.handle_event)
+
     def _to_tutorial(self):
         self.to_scene(self.tutorial)
 
+    @tracer.traced(category="transition")
     def _on_intro_opaque(self):
         self.scene.init()
 
@@ -84,12 +116,13 @@ class Stage:
         else:
             emit_event(FADE_OUT)
 
+    @tracer.traced(category="transition")
     def to_scene(self, scene: Renderable):
         if self.scene != scene:
             self.scene = scene
             scene.init()
 
-    def handle_event(self, event: pygame.event.Event, world_time: int) -> None:
+    def _handle_stage_event(self, event: pygame.event.Event, world_time: int) -> None:
         if event.type == SCENE_FINISH:
             print("Scene Finish")
             self.queue_next_scene()
@@ -97,21 +130,71 @@ class Stage:
             if self.next_scene_queued is not None:
                 self.to_scene(self.next_scene_queued)
 
-        self.scene.handle_event(event, world_time)
-        self.fader.handle_event(event, world_time)
-        self.action_menu.handle_event(event, world_time)
-        self.soundtrack.handle_event(event, world_time)
+    def _handle_scene_event(self, event: pygame.event.Event, world_time: int) -> None:
+        # The scene changes under the router, so only pass what the current one wants
+        if event.type in self.scene.EVENT_TYPES:
+            self.scene.handle_event(event, world_time)
 
+    def handle_event(self, event: pygame.event.Event, world_time: int) -> None:
+        self.router.dispatch(event, world_time)
+
+    @tracer.traced(category="frame")
+    def handle_events(self, events: list[pygame.event.Event], world_time: int) -> None:
+        """
+        Handles one frame worth of events. Mouse motion is coalesced first,
+        as only the latest mouse position matters within a frame. Game events
+        published since the last frame are delivered after the input.
+        """
+        for event in coalesce_mouse_motion(events):
+            self.router.dispatch(event, world_time)
+        self.router.flush(world_time)
+
+    def is_idle(self) -> bool:
+        """
+        Whether the last frame moved nothing and no game events are waiting,
+        so the next frame would look the same
+        """
+        return not animation_activity.is_active and len(self.router.pending) == 0
+
+    @tracer.traced(category="frame")
+    def update(self, delta_time: float) -> None:
+        """
+        Advances the game logic by one fixed simulation step
+        """
+        animation_scheduler.frame(delta_time)
+        self.scene.update(delta_time)
+
+    @tracer.traced(category="frame")
     def render(self, delta_time: int) -> None:
+        animation_activity.reset()
+        animation_scheduler.present()
         self.scene.render(delta_time)
-        self.fader.render(delta_time)
+        with gpu_profiler.section("fader"):
+            self.fader.render(delta_time)
         if self.intro:
-            self.intro.render(delta_time)
-        self.action_menu.render(delta_time)
+            with gpu_profiler.section("intro_plane"):
+                self.intro.render(delta_time)
+        with gpu_profiler.section("action_menu"):
+            self.action_menu.render(delta_time)
+        if self.perf_hud:
+            with gpu_profiler.section("perf_hud"):
+                self.perf_hud.render(delta_time)
+        gpu_profiler.end_frame()
 
     def destroy(self):
+        for handler in (
+            self._handle_stage_event,
+            self._handle_scene_event,
+            self.fader.handle_event,
+            self.action_menu.handle_event,
+            self.soundtrack.handle_event,
+        ):
+            self.router.unsubscribe(handler)
         if self.intro:
             self.intro.destroy()
         self.scene.destroy()
         self.fader.destroy()
         self.action_menu.destroy()
+        if self.perf_hud:
+            self.router.unsubscribe(self.perf_hud.handle_event)
+            self.perf_hud.destroy()
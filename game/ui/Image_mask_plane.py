@@ -29,8 +29,8 @@ class ImageMaskPlane(Plane):
         super().__init__(ctx, camera_matrix, position, dimensions, **kwargs)
 
         (_texture, texture_location) = get_texture(self.ctx, texture_filename)
-        self.obj.shader["u_texture_0"] = texture_location
-        self.obj.shader["u_color"] = color
+        self.obj.set_uniform("u_texture_0", texture_location)
+        self.obj.set_uniform("u_color", color)
 
     def _get_shadeable_object(self):
         return ShadeableObject(
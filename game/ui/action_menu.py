@@ -7,6 +7,7 @@ from ui.image_plane import ImagePlane
 
 
 class ActionMenu:
+  EVENT_TYPES = ImagePlane.EVENT_TYPES
 
   def __init__(
     self,
@@ -16,7 +16,7 @@ class ColorPlane(Plane):
         **kwargs
     ):
         super().__init__(ctx, camera_matrix, position, dimensions, **kwargs)
-        self.obj.shader["v_color"].write(color)
+        self.obj.set_uniform("v_color", color)
 
 
     def _get_shadeable_object(self):
@@ -32,6 +32,6 @@ class ColorPlane(Plane):
 
     def render(self, delta_time: int, color=None):
         if color is not None:
-            self.obj.shader["v_color"].write(color)
+            self.obj.set_uniform("v_color", color)
         super().render()
 
@@ -4,12 +4,14 @@ import glm
 from engine.events import emit_event, FADE_IN, FADED_IN, FADE_OUT, FADED_OUT
 from ui.color_plane import ColorPlane
 from constants.colors import Colors
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import Animator, AnimationLerper, AnimationLerpFunction, animation_scheduler
 
 FADE_IN_TIME = 2000 # ms
 WHITE_RGB = Colors.WHITE.rgb
 
 class Fader():
+  EVENT_TYPES = (FADE_IN, FADE_OUT)
+
   def __init__(self, ctx: moderngl.Context, m_vp: glm.mat4):
     self.plane = ColorPlane(
         ctx,
@@ -21,7 +23,8 @@ class Fader():
     self.animator = Animator(
         AnimationLerper(AnimationLerpFunction.ease_in, FADE_IN_TIME),
         0.0,
-        on_stop=self._on_stop
+        on_stop=self._on_stop,
+        system=animation_scheduler,
     )
     self.is_faded = False
 
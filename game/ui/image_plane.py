@@ -25,7 +25,7 @@ class ImagePlane(Plane):
     super().__init__(ctx, camera_matrix, position, dimensions, **kwargs)
 
     (_texture, texture_location) = get_texture(self.ctx, texture_filename)
-    self.obj.shader["u_texture_0"] = texture_location
+    self.obj.set_uniform("u_texture_0", texture_location)
 
 
   def _get_shadeable_object(self):
@@ -51,5 +51,5 @@ class ImagePlane(Plane):
 
 
   def render(self, delta_time: int, opacity=1.0):
-    self.obj.shader['opacity'] = opacity
+    self.obj.set_uniform('opacity', opacity)
     super().render()
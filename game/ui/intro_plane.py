@@ -4,7 +4,7 @@ from engine.audio.sound_effect import SoundEffect
 from ui.color_plane import ColorPlane
 from ui.image_plane import ImagePlane
 from constants.colors import Colors
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import Animator, AnimationLerper, AnimationLerpFunction, animation_scheduler
 
 DEFAULT_FADE_TIME = 2000 # ms
 DEFAULT_STAY_TIME = 3000 # ms
@@ -21,7 +21,8 @@ class IntroPlane():
     self.animator = Animator(
         AnimationLerper(AnimationLerpFunction.linear, kwargs.get("fade_time",DEFAULT_FADE_TIME)),
         0.0,
-        on_stop=self._on_stop
+        on_stop=self._on_stop,
+        system=animation_scheduler,
     )
     self.stay_time = kwargs.get("stay_time", DEFAULT_STAY_TIME)
 
@@ -1,9 +1,10 @@
 import glm
 
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import LoopingAnimation, AnimationLerper, AnimationLerpFunction
 from ui.Image_mask_plane import ImageMaskPlane
 
-DISPLACE = 0.001
+# How far the button bobs to either side
+BOB_DISTANCE = 0.015
 
 
 class NextButton(ImageMaskPlane):
@@ -19,13 +20,13 @@ class NextButton(ImageMaskPlane):
         )
 
         self.matrix = self.matrix
-        self.animate_matrix = glm.mat4()
-        self.position_animator = Animator(
-            AnimationLerper(AnimationLerpFunction.linear, 1000),
-            start_value=-DISPLACE,
+        self.bob_animation = LoopingAnimation(
+            AnimationLerper(AnimationLerpFunction.ease_in_out, 1000),
+            -BOB_DISTANCE,
+            BOB_DISTANCE,
             reversible=True,
         )
-        self.position_animator.start(DISPLACE)
+        self.bob_animation.start()
 
     def set_active(self, active):
         self.click_detector.is_enabled = active
@@ -34,11 +35,10 @@ class NextButton(ImageMaskPlane):
         return self.click_detector.is_enabled
 
     def set_color(self, color):
-        self.obj.shader["u_color"] = color
+        self.obj.set_uniform("u_color", color)
 
     def render(self, delta_time: int, opacity=1.0):
-        d = self.position_animator.frame(delta_time)
-        self.animate_matrix = self.animate_matrix * glm.translate(glm.vec3(d, 0, 0))
-        matrix = self.animate_matrix * self.matrix
-        self.obj.shader["m_mvp"].write(matrix)
+        d = self.bob_animation.value()
+        matrix = glm.translate(glm.vec3(d, 0, 0)) * self.matrix
+        self.obj.set_uniform("m_mvp", matrix)
         super().render(delta_time)
@@ -0,0 +1,234 @@
+import glm
+import moderngl
+import numpy as np
+import pygame
+
+from constants.colors import Colors, set_opacity
+from constants.dimensions import SCREEN_DIMENSIONS
+from constants.fonts import FONTS
+from engine.animation import animation_activity
+from engine.render_stats import render_stats
+from engine.shader import get_shader_program, release_shader_program
+from engine.texture import get_surface_texture
+
+GLYPHS = "".join(chr(code) for code in range(32, 127))
+# A white square in the corner of the atlas, for quads drawn without glyphs
+SOLID_SIZE = 4
+
+# Position, uv and color of a vertex
+VERTEX_FORMAT = ("2f 2f 4f", "in_position", "in_textcoord_0", "in_color")
+VERTEX_SIZE = 8
+MAX_QUADS = 512
+QUAD_INDICES = (0, 1, 2, 2, 1, 3)
+
+TOGGLE_KEY = pygame.K_F3
+# The text and graph are made again this often, every frame is still graphed
+REFRESH_TIME = 250  # ms
+
+PADDING = 8
+GRAPH_FRAMES = 120
+BAR_WIDTH = 2
+GRAPH_HEIGHT = 48
+# Frame time at the top of the graph
+GRAPH_MAX_TIME = 50.0  # ms
+TARGET_FRAME_TIME = 1000 / 60  # ms
+
+PANEL_COLOR = set_opacity(Colors.BLACK, 0.6)
+TEXT_COLOR = Colors.WHITE
+TARGET_COLOR = set_opacity(Colors.WHITE, 0.5)
+# Bars of frames within the target frame time, within twice that, and slower
+BAR_COLORS = (Colors.APPLE_GREEN, Colors.CYAN, Colors.DARK_RED)
+
+
+def _quad_vertices(rects: np.ndarray, uvs: np.ndarray, colors: np.ndarray):
+    """
+    @returns: the 4 vertices of every (x0, y0, x1, y1) rect, as
+    top left, top right, bottom left and bottom right
+    """
+    corner_xs = [0, 2, 0, 2]
+    corner_ys = [1, 1, 3, 3]
+    positions = np.stack([rects[:, corner_xs], rects[:, corner_ys]], axis=2)
+    textcoords = np.stack([uvs[:, corner_xs], uvs[:, corner_ys]], axis=2)
+    corner_colors = np.repeat(colors[:, np.newaxis, :], 4, axis=1)
+    return np.concatenate([positions, textcoords, corner_colors], axis=2).reshape(-1, VERTEX_SIZE)
+
+
+class GlyphAtlas:
+    """
+    Every printable ASCII character of a font rendered once into a single
+    texture, so text is drawn as quads instead of surfaces made every frame
+    """
+
+    def __init__(self, ctx: moderngl.Context, font: pygame.font.Font, texture_name: str):
+        glyph_surfaces = [font.render(glyph, True, (255, 255, 255)) for glyph in GLYPHS]
+        width = SOLID_SIZE + sum(surface.get_width() + 1 for surface in glyph_surfaces) + 1
+        height = max(SOLID_SIZE, *(surface.get_height() for surface in glyph_surfaces))
+
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        surface.fill((255, 255, 255, 255), pygame.Rect(0, 0, SOLID_SIZE, SOLID_SIZE))
+
+        # The texture is flipped on upload, so v counts up from the bottom row
+        self.solid_uv = (SOLID_SIZE / 2 / width, 1 - SOLID_SIZE / 2 / height)
+        # glyph -> (width, height, u0, v0, u1, v1)
+        self.glyphs = {}
+        x = SOLID_SIZE + 1
+        for (glyph, glyph_surface) in zip(GLYPHS, glyph_surfaces):
+            (glyph_width, glyph_height) = glyph_surface.get_size()
+            surface.blit(glyph_surface, (x, 0))
+            self.glyphs[glyph] = (
+                glyph_width,
+                glyph_height,
+                x / width,
+                1.0,
+                (x + glyph_width) / width,
+                1 - glyph_height / height,
+            )
+            x += glyph_width + 1
+        self.line_height = font.get_linesize()
+
+        (self.texture, self.texture_location) = get_surface_texture(ctx, texture_name, surface)
+        # Glyphs are drawn at whole pixels, at the size they were rendered
+        self.texture.filter = (moderngl.NEAREST, moderngl.NEAREST)
+
+    def text_width(self, text: str) -> int:
+        return sum(self.glyphs.get(glyph, self.glyphs["?"])[0] for glyph in text)
+
+    def layout(self, text: str, x: int, y: int):
+        """
+        @returns: the rects and uvs of the quads of every glyph of text,
+        from its top left corner at x, y
+        """
+        rects = []
+        uvs = []
+        for glyph in text:
+            (glyph_width, glyph_height, *uv) = self.glyphs.get(glyph, self.glyphs["?"])
+            rects.append((x, y, x + glyph_width, y + glyph_height))
+            uvs.append(uv)
+            x += glyph_width
+        return (rects, uvs)
+
+
+class PerfHud:
+    """
+    Overlays the frame rate, a graph of the last frame times, the draw calls
+    and triangles of the last frame, the animators running and the memory
+    of the gl objects alive. TOGGLE_KEY hides and shows it.
+
+    All of it is drawn with a single draw call, from a glyph atlas baked
+    once. The vertices are only made and uploaded again every REFRESH_TIME,
+    in between a frame costs the draw call and noting the frame time.
+    """
+    EVENT_TYPES = (pygame.KEYDOWN,)
+
+    def __init__(self, ctx: moderngl.Context):
+        self.ctx = ctx
+        self.is_visible = True
+
+        self.atlas = GlyphAtlas(ctx, FONTS["medium"], "perf_hud_glyphs")
+        self.shader = get_shader_program(ctx, "hud")
+        self.buffer = ctx.buffer(reserve=MAX_QUADS * 4 * VERTEX_SIZE * 4, dynamic=True)
+        quad_indices = np.array(QUAD_INDICES, dtype="u4")
+        self.index_buffer = ctx.buffer(
+            (quad_indices + 4 * np.arange(MAX_QUADS, dtype="u4")[:, np.newaxis]).astype("u4")
+        )
+        self.vertex_array = ctx.vertex_array(
+            self.shader,
+            [(self.buffer, *VERTEX_FORMAT)],
+            index_buffer=self.index_buffer,
+            index_element_size=4,
+        )
+
+        self.frame_times = np.zeros(GRAPH_FRAMES)
+        self.frame_count = 0
+        self.refresh_elapsed = 0.0
+        self.refresh_frames = 0
+        self.text_vertices = None
+        self.panel_width = GRAPH_FRAMES * BAR_WIDTH + 2 * PADDING
+        self.graph_top = PADDING
+        self.vertex_count = 0
+
+    def handle_event(self, event: pygame.event.Event, world_time: int):
+        if event.type == pygame.KEYDOWN and event.key == TOGGLE_KEY:
+            self.is_visible = not self.is_visible
+
+    def __refresh_text(self):
+        frame_time = self.refresh_elapsed / self.refresh_frames
+        frame_rate = 1000 / frame_time if frame_time > 0 else 0
+        lines = [
+            f"{frame_rate:.0f} fps  {frame_time:.1f} ms",
+            f"{render_stats.frame_draw_calls} draw calls  {render_stats.frame_triangles / 1000:.1f}k triangles",
+            f"{animation_activity.animators} animators",
+            f"{render_stats.gl_memory / 2 ** 20:.1f} MiB of buffers and textures",
+        ]
+        rects = []
+        uvs = []
+        for (line_index, line) in enumerate(lines):
+            (line_rects, line_uvs) = self.atlas.layout(
+                line, PADDING * 2, PADDING * 2 + line_index * self.atlas.line_height
+            )
+            rects.extend(line_rects)
+            uvs.extend(line_uvs)
+        colors = np.tile(np.array(TEXT_COLOR), (len(rects), 1))
+        self.text_vertices = _quad_vertices(np.array(rects), np.array(uvs), colors)
+
+        text_width = max(self.atlas.text_width(line) for line in lines)
+        self.panel_width = max(text_width, GRAPH_FRAMES * BAR_WIDTH) + 2 * PADDING
+        self.graph_top = PADDING * 3 + len(lines) * self.atlas.line_height
+        self.refresh_elapsed = 0.0
+        self.refresh_frames = 0
+
+    def __make_vertices(self):
+        """
+        The panel, the frame time graph and its target line, and the text
+        """
+        graph_left = PADDING * 2
+        graph_bottom = self.graph_top + GRAPH_HEIGHT
+        # Oldest frame first
+        frame_times = np.roll(self.frame_times, -(self.frame_count % GRAPH_FRAMES))
+        bar_heights = np.minimum(frame_times / GRAPH_MAX_TIME, 1.0) * GRAPH_HEIGHT
+        bar_lefts = graph_left + np.arange(GRAPH_FRAMES) * BAR_WIDTH
+        target_y = graph_bottom - TARGET_FRAME_TIME / GRAPH_MAX_TIME * GRAPH_HEIGHT
+
+        rects = np.concatenate([
+            [(PADDING, PADDING, PADDING + self.panel_width, graph_bottom + PADDING)],
+            np.stack([
+                bar_lefts,
+                graph_bottom - bar_heights,
+                bar_lefts + BAR_WIDTH,
+                np.full(GRAPH_FRAMES, graph_bottom),
+            ], axis=1),
+            [(graph_left, target_y, graph_left + GRAPH_FRAMES * BAR_WIDTH, target_y + 1)],
+        ])
+        bar_colors = np.array(BAR_COLORS)[np.digitize(frame_times, (TARGET_FRAME_TIME, TARGET_FRAME_TIME * 2))]
+        colors = np.concatenate([[np.array(PANEL_COLOR)], bar_colors, [np.array(TARGET_COLOR)]])
+        uvs = np.tile(np.array(self.atlas.solid_uv * 2), (len(rects), 1))
+        vertices = np.concatenate([_quad_vertices(rects, uvs, colors), self.text_vertices])
+        return vertices[:MAX_QUADS * 4].astype("f4")
+
+    def render(self, delta_time: int):
+        self.frame_times[self.frame_count % GRAPH_FRAMES] = delta_time
+        self.frame_count += 1
+        self.refresh_elapsed += delta_time
+        self.refresh_frames += 1
+
+        if self.is_visible:
+            if self.refresh_elapsed >= REFRESH_TIME or self.text_vertices is None:
+                self.__refresh_text()
+                vertices = self.__make_vertices()
+                self.buffer.write(vertices)
+                self.vertex_count = len(vertices) // 4 * len(QUAD_INDICES)
+            self.shader["u_screen"].write(glm.vec2(SCREEN_DIMENSIONS))
+            self.shader["u_texture_0"] = self.atlas.texture_location
+            # Drawn over everything, the game keeps depth testing on otherwise
+            self.ctx.disable(moderngl.DEPTH_TEST)
+            self.vertex_array.render(vertices=self.vertex_count)
+            self.ctx.enable(moderngl.DEPTH_TEST)
+
+        render_stats.end_frame()
+
+    def destroy(self):
+        self.vertex_array.release()
+        self.buffer.release()
+        self.index_buffer.release()
+        release_shader_program(self.shader)
@@ -4,7 +4,7 @@ import glm
 from engine.renderable import Renderable
 import numpy as np
 
-from engine.events.mouse import ClickDetector, find_mouse_face
+from engine.events.mouse import ClickDetector, ScreenFaces
 
 
 SQUARE_VERTICES = np.array(
@@ -24,6 +24,8 @@ SQUARE_CLIP = [
 ]
 
 class Plane(Renderable):
+    EVENT_TYPES = ClickDetector.EVENT_TYPES
+
     def __init__(
         self,
         ctx: moderngl.Context,
@@ -41,10 +43,10 @@ class Plane(Renderable):
         )
 
         self.vertex_data = self._get_vertex_data()
-        self.click_vertices = [[self.matrix * v for v in SQUARE_CLIP]]
+        self.click_faces = ScreenFaces(np.array([[self.matrix * v for v in SQUARE_CLIP]]))
 
         self.obj = self._get_shadeable_object()
-        self.obj.shader["m_mvp"].write(self.matrix)
+        self.obj.set_uniform("m_mvp", self.matrix)
 
         self.on_click = kwargs.get("on_click", None)
         self.click_detector = ClickDetector(on_click=self._on_click) if self.on_click else None
@@ -62,7 +64,7 @@ class Plane(Renderable):
         return SQUARE_VERTICES
 
     def _on_click(self, mouse_pos, _mouse_button):
-        if find_mouse_face(mouse_pos, self.click_vertices) == 0:
+        if self.click_faces.find_face(mouse_pos) == 0:
             self.on_click()
 
     def handle_event(self, event: pygame.event.Event, world_time: int):
@@ -1,7 +1,7 @@
 import glm
 from ui.color_plane import ColorPlane
 from ui.progress_dot import ProgressDot
-from engine.shader import get_shader_program
+from engine.shader import get_shader_program, release_shader_program
 from constants.colors import Colors
 
 class Progress(ColorPlane):
@@ -9,7 +9,7 @@ class Progress(ColorPlane):
         position = glm.vec3(1.6, -1.15, -2.1)
         super().__init__(ctx, camera_matrix, position)
 
-        shader = get_shader_program(ctx, "uniform_color")
+        self.dot_shader = shader = get_shader_program(ctx, "uniform_color")
 
         self.matrix = (self.matrix *
             glm.scale(glm.vec3(0.5, 0.5, 0.5))
@@ -44,5 +44,7 @@ class Progress(ColorPlane):
             dot.render(color)
 
     def destroy(self):
-        self.dot.destroy()
+        for dot in self.dots:
+            dot.destroy()
+        release_shader_program(self.dot_shader)
         super().destroy()
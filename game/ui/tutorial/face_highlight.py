@@ -1,5 +1,5 @@
 from moderngl import Context
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import LoopingAnimation, AnimationLerper, AnimationLerpFunction
 from models.face import Face
 import glm
 import numpy as np
@@ -20,16 +20,17 @@ class FaceHighlight(Renderable):
       },
       np.array(face.face_vertices) * 1.11
     )
-    self.brightness_animator = Animator(
+    self.brightness_animation = LoopingAnimation(
       AnimationLerper(AnimationLerpFunction.linear, 1000),
       0.0,
+      1.0,
       reversible=True
     )
-    self.brightness_animator.start(1.0)
+    self.brightness_animation.start()
     self.outline.set_uniform('m_mvp', m_vp)
 
   def render(self, delta_time: int, m_model: glm.mat4):
-    brightness = self.brightness_animator.frame(delta_time)
+    brightness = self.brightness_animation.value()
     self.outline.set_uniform('m_mvp', self.m_vp * m_model)
     self.outline.set_uniform('v_color', HIGHLIGHT_COLOR * brightness)
     self.outline.render()
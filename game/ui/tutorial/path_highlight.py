@@ -1,5 +1,5 @@
 from moderngl import Context
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import LoopingAnimation, AnimationLerper, AnimationLerpFunction
 from models.face import Face
 import glm
 import numpy as np
@@ -13,16 +13,12 @@ class PathHighlight(Renderable):
   def __init__(self, ctx: Context, m_vp: glm.mat4, faces: list[Face]):
     self.m_vp = m_vp
 
-    path_vertices = []
-    for face in faces:
-      coordinate_system = face.coordinate_system
-      for polygon in face.puzzle_face.active_polygons:
-        for node in polygon.nodes:
-          path_vertices.append(
-            coordinate_system.uv_coordinates_to_face_coordinates(
-              node.uv_coordinates
-            )
-          )
+    path_vertices = np.concatenate([
+      face.coordinate_system.uv_array_to_face_coordinates(
+        face.puzzle_face.carve_uvs()
+      )
+      for face in faces
+    ])
 
     self.outline = ShadeableObject(
       ctx,
@@ -32,16 +28,17 @@ class PathHighlight(Renderable):
       },
       np.array(path_vertices) * 1.11
     )
-    self.brightness_animator = Animator(
+    self.brightness_animation = LoopingAnimation(
       AnimationLerper(AnimationLerpFunction.linear, 1000),
       0.0,
+      1.0,
       reversible=True
     )
-    self.brightness_animator.start(1.0)
+    self.brightness_animation.start()
     self.outline.set_uniform('m_mvp', m_vp)
 
   def render(self, delta_time: int, m_model: glm.mat4):
-    brightness = self.brightness_animator.frame(delta_time)
+    brightness = self.brightness_animation.value()
     self.outline.set_uniform('m_mvp', self.m_vp * m_model)
     self.outline.set_uniform('v_color', HIGHLIGHT_COLOR * brightness)
     self.outline.render()
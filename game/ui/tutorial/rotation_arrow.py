@@ -1,5 +1,5 @@
 from moderngl import Context
-from engine.animation import Animator, AnimationLerper, AnimationLerpFunction
+from engine.animation import LoopingAnimation, AnimationLerper, AnimationLerpFunction
 from engine.texture import get_texture
 import glm
 from engine.shadeable_object import ShadeableObject
@@ -29,7 +29,7 @@ class RotationArrow(Renderable):
       },
       vertices
     )
-    self.arrow.shader['m_mvp'].write(
+    self.arrow.set_uniform('m_mvp',
       glm.translate(
         self.camera.view_projection_matrix,
         glm.vec3(1.0, 1.0, 0.0)
@@ -38,19 +38,20 @@ class RotationArrow(Renderable):
         glm.vec3(0.5, 0.5, 0.5)
       )
     )
-    self.arrow.shader["u_texture_0"] = texture_location
-    self.arrow.shader["u_color"].write(glm.vec3(0.0, 1.0, 0.0))
+    self.arrow.set_uniform("u_texture_0", texture_location)
+    self.arrow.set_uniform("u_color", glm.vec3(0.0, 1.0, 0.0))
 
-    self.brightness_animator = Animator(
+    self.brightness_animation = LoopingAnimation(
       AnimationLerper(AnimationLerpFunction.linear, 1000),
       0.0,
+      1.0,
       reversible=True
     )
-    self.brightness_animator.start(1.0)
+    self.brightness_animation.start()
 
 
   def render(self, delta_time: int, m_mvp: glm.mat4):
-    brightness = self.brightness_animator.frame(delta_time)
+    brightness = self.brightness_animation.value()
     self.arrow.set_uniform('u_color', glm.vec3(brightness, 1.0, brightness))
     self.arrow.render(mode=moderngl.TRIANGLE_STRIP)
 